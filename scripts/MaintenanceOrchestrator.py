@@ -14,91 +14,135 @@ Runs the full maintenance sequence in the correct order:
 11. Clear service caches
 12. Backup Portal hosted services
 13. Portal sharing audit
+
+Steps 6, 8-9 and 11-13 only depend on compress having finished, so they run
+concurrently; step 7 waits for step 6 (see 'depends_on' in SCRIPT_SEQUENCE).
 """
 
+import collections
+import contextlib
+import importlib
+import io
+import logging
 import os
 import subprocess
 import sys
+import threading
 import time
+import traceback
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
 
 from dotenv import load_dotenv
 
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+sys.path.insert(0, PROJECT_ROOT)
 from src.sde_utils import setup_logging, log_and_print, validate_paths
 
 load_dotenv()
 
+# Config is read once per run; changes to the environment need a restart
+ENV_SNAPSHOT = os.environ.copy()
 
+MAX_CONCURRENT_STEPS = 4
+OUTPUT_TAIL_LINES = 50
+
+# Every step up to Allow Connections is isolated so it keeps run_script's hard
+# timeout: a hung step must not leave the databases blocked
 SCRIPT_SEQUENCE = [
     {
         'name': 'Block Connections',
         'module': 'src.version_management.ManageConnections',
         'critical': True,
+        'isolate': True,
         'args': ['block']
     },
     {
         'name': 'Disconnect Users',
         'module': 'src.connection_management.DisconnectUsers',
-        'critical': True
+        'critical': True,
+        'isolate': True,
+        'depends_on': ['Block Connections']
     },
     {
         'name': 'Reconcile/Post Versions',
         'module': 'src.version_management.ReconcilePostVersions',
-        'critical': False
+        'critical': False,
+        'isolate': True,
+        'depends_on': ['Disconnect Users']
     },
     {
         'name': 'Delete Stale Versions',
         'module': 'src.version_management.DeleteStaleVersions',
-        'critical': False
+        'critical': False,
+        'isolate': True,
+        'depends_on': ['Reconcile/Post Versions']
     },
     {
         'name': 'Compress/Rebuild/Analyze',
         'module': 'src.database_maintenance.CompressRebuildAnalyze',
-        'critical': True
+        'critical': True,
+        'isolate': True,
+        'depends_on': ['Delete Stale Versions']
     },
     {
         'name': 'Check Geometry',
         'module': 'src.data_integrity.RepairGeometry',
-        'critical': False
+        'critical': False,
+        'isolate': True,
+        'depends_on': ['Compress/Rebuild/Analyze']
     },
     {
         'name': 'Validate Topology',
         'module': 'src.data_integrity.ValidateTopology',
-        'critical': False
+        'critical': False,
+        'isolate': True,
+        # Geometry repairs edit the same feature classes; validate afterwards
+        'depends_on': ['Compress/Rebuild/Analyze', 'Check Geometry']
     },
     {
         'name': 'Export XML Schema',
         'module': 'src.backup.XMLWorkspaceExport',
-        'critical': False
+        'critical': False,
+        'isolate': True,
+        'depends_on': ['Compress/Rebuild/Analyze']
     },
     {
         'name': 'Generate Health Report',
         'module': 'src.health_monitoring.DatabaseHealthSummary',
-        'critical': False
+        'critical': False,
+        'isolate': True,
+        'depends_on': ['Compress/Rebuild/Analyze']
     },
     {
         'name': 'Allow Connections',
         'module': 'src.version_management.ManageConnections',
         'critical': True,
-        'args': ['allow']
+        'isolate': True,
+        'args': ['allow'],
+        'depends_on': ['Check Geometry', 'Validate Topology', 'Export XML Schema',
+                       'Generate Health Report']
     },
     {
         'name': 'Server Health Check',
         'module': 'src.server_portal.ServerPortalMaintenance',
         'critical': False,
-        'requires_config': ['AGS_SERVER_URL', 'AGS_ADMIN_USER', 'AGS_ADMIN_PASSWORD']
+        'requires_config': ['AGS_SERVER_URL', 'AGS_ADMIN_USER', 'AGS_ADMIN_PASSWORD'],
+        'depends_on': ['Compress/Rebuild/Analyze']
     },
     {
         'name': 'Portal Backup',
         'module': 'src.server_portal.PortalBackup',
         'critical': False,
-        'requires_config': ['PORTAL_URL', 'PORTAL_ADMIN_USER', 'PORTAL_ADMIN_PASSWORD', 'PORTAL_BACKUP_DIR']
+        'requires_config': ['PORTAL_URL', 'PORTAL_ADMIN_USER', 'PORTAL_ADMIN_PASSWORD', 'PORTAL_BACKUP_DIR'],
+        'depends_on': ['Compress/Rebuild/Analyze']
     },
     {
         'name': 'Portal Sharing Audit',
         'module': 'src.server_portal.PortalSharingAudit',
         'critical': False,
-        'requires_config': ['PORTAL_URL', 'PORTAL_ADMIN_USER', 'PORTAL_ADMIN_PASSWORD']
+        'requires_config': ['PORTAL_URL', 'PORTAL_ADMIN_USER', 'PORTAL_ADMIN_PASSWORD'],
+        'depends_on': ['Compress/Rebuild/Analyze']
     }
 ]
 
@@ -112,11 +156,16 @@ def check_config_available(required_vars):
     Returns:
         True if all are set, False otherwise
     """
-    return all(os.environ.get(var) for var in required_vars)
+    return all(ENV_SNAPSHOT.get(var) for var in required_vars)
 
 
 def run_script(script_path, args=None, timeout=18000):
-    """Run a Python script.
+    """Run a Python script, streaming its output to the log.
+
+    Each output line is logged as it arrives; only the last
+    OUTPUT_TAIL_LINES lines are kept in memory for the returned output.
+    The pipe is read as bytes and decoded leniently, so stray non-UTF-8
+    output from a tool cannot abort the read loop.
 
     Args:
         script_path: Path to script (module path like 'src.module' or direct path)
@@ -126,36 +175,187 @@ def run_script(script_path, args=None, timeout=18000):
     Returns:
         Tuple of (success, output)
     """
-    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-
     if '.' in script_path and not script_path.endswith('.py'):
-        full_path = os.path.join(project_root, script_path.replace('.', os.sep) + '.py')
+        full_path = os.path.join(PROJECT_ROOT, script_path.replace('.', os.sep) + '.py')
     else:
-        full_path = os.path.join(project_root, script_path)
+        full_path = os.path.join(PROJECT_ROOT, script_path)
 
     cmd = [sys.executable, full_path]
     if args:
         cmd.extend(args)
 
+    label = os.path.splitext(os.path.basename(full_path))[0]
+    tail = collections.deque(maxlen=OUTPUT_TAIL_LINES)
+
     try:
-        result = subprocess.run(
+        process = subprocess.Popen(
             cmd,
-            capture_output=True,
-            text=True,
-            timeout=timeout,
-            cwd=project_root
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            cwd=PROJECT_ROOT
         )
-        return result.returncode == 0, result.stdout + result.stderr
-    except subprocess.TimeoutExpired:
-        hours = timeout // 3600
-        return False, f"Script timed out after {hours} hour(s)"
     except Exception as e:
         return False, str(e)
 
+    # Kill on timeout even if the script stops producing output
+    timed_out = threading.Event()
+
+    def kill():
+        timed_out.set()
+        process.kill()
+
+    watchdog = threading.Timer(timeout, kill)
+    watchdog.start()
+    try:
+        for line in process.stdout:
+            tail.append(line)
+            log_and_print(f"[{label}] {line.decode('utf-8', 'replace').rstrip()}")
+        returncode = process.wait()
+    finally:
+        watchdog.cancel()
+
+    if timed_out.is_set():
+        hours = timeout // 3600
+        return False, f"Script timed out after {hours} hour(s)"
+
+    return returncode == 0, b"".join(tail).decode('utf-8', 'replace')
+
+
+class TailWriter(io.TextIOBase):
+    """Text stream that passes writes through and keeps the last lines.
+
+    Lets an in-process step stream to the console as it runs while only
+    OUTPUT_TAIL_LINES lines are held for the step result.
+    """
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.tail = collections.deque(maxlen=OUTPUT_TAIL_LINES)
+        self.partial = ''
+
+    def writable(self):
+        return True
+
+    def write(self, text):
+        self.stream.write(text)
+        lines = (self.partial + text).split('\n')
+        self.partial = lines.pop()
+        self.tail.extend(line + '\n' for line in lines)
+        return len(text)
+
+    def flush(self):
+        self.stream.flush()
+
+    def getvalue(self):
+        return ''.join(self.tail) + self.partial
+
+
+def run_module_inproc(module_name, args=None):
+    """Run a module's main() in the current interpreter.
+
+    Avoids paying for a fresh Python process and arcpy import on every step.
+    Output reaches the console as it is written; only the last
+    OUTPUT_TAIL_LINES lines are kept for the returned output.
+    The step gets its own log file; sys.argv and any existing logging
+    handlers are restored afterwards. Steps that need a hard timeout should
+    be marked 'isolate' so they run through run_script instead.
+
+    Args:
+        module_name: Dotted module path (e.g. 'src.module')
+        args: Optional command line arguments (exposed via sys.argv)
+
+    Returns:
+        Tuple of (success, output)
+    """
+    root = logging.getLogger()
+    saved_handlers = root.handlers[:]
+    saved_argv = sys.argv
+    for handler in saved_handlers:
+        root.removeHandler(handler)
+
+    sys.argv = [module_name] + list(args or [])
+    buf = TailWriter(sys.stdout)
+
+    try:
+        with contextlib.redirect_stdout(buf), contextlib.redirect_stderr(buf):
+            module = importlib.import_module(module_name)
+            module.main()
+        return True, buf.getvalue()
+    except SystemExit as e:
+        return e.code in (0, None), buf.getvalue()
+    except Exception:
+        return False, buf.getvalue() + traceback.format_exc()
+    finally:
+        sys.argv = saved_argv
+        # Step workers outlive the step, so don't let a SQL session or cached
+        # results carry into later steps (an open session would pin states
+        # during the isolated compress). Steps import sde_utils by its
+        # top-level name, which is a separate module from src.sde_utils.
+        step_utils = sys.modules.get('sde_utils')
+        if step_utils is not None:
+            step_utils.close_sql_connections()
+            step_utils.invalidate_versions()
+            step_utils._execute_sql_cached.cache_clear()
+        # arcpy also keeps geodatabase sessions open between tool calls; a
+        # session left by one step would pin states during compress, or be
+        # reused after Disconnect Users has killed it
+        arcpy = sys.modules.get('arcpy')
+        if arcpy is not None:
+            try:
+                arcpy.ClearWorkspaceCache_management()
+            except Exception as e:
+                log_and_print(f"Error clearing workspace cache: {e}", "warning")
+        for handler in root.handlers[:]:
+            root.removeHandler(handler)
+            handler.close()
+        for handler in saved_handlers:
+            root.addHandler(handler)
+
+
+def init_step_worker():
+    """Import arcpy once per step worker so later steps reuse the loaded runtime."""
+    try:
+        import arcpy  # noqa: F401
+    except ImportError:
+        pass
+
+
+def run_step(step):
+    """Run a single step.
+
+    Module steps run in-process (inside a step worker); isolated and
+    script steps run as subprocesses.
+
+    Args:
+        step: Step dict from SCRIPT_SEQUENCE
+
+    Returns:
+        Tuple of (success, output, duration)
+    """
+    start_time = time.time()
+
+    if 'module' in step and not step.get('isolate', False):
+        success, output = run_module_inproc(step['module'], step.get('args'))
+    elif 'module' in step:
+        success, output = run_script(step['module'], step.get('args'))
+    elif 'script' in step:
+        success, output = run_script(step['script'], timeout=3600)
+    else:
+        success, output = False, "No module or script specified"
+
+    return success, output, time.time() - start_time
+
 
 def run_maintenance_sequence(steps=None, skip_steps=None):
     """Run the maintenance sequence.
 
+    Steps are dispatched as soon as everything in their 'depends_on' list
+    has finished, so independent steps run concurrently. Module steps run
+    in a persistent pool of step workers that import arcpy once and reuse
+    it for every step; each worker runs one step at a time, so stdout
+    capture and logging handlers never overlap. Isolated and script steps
+    are run as subprocesses from a thread so they keep a hard timeout.
+
     Args:
         steps: List of step names to run (None = all)
         skip_steps: List of step names to skip
@@ -171,6 +371,8 @@ def run_maintenance_sequence(steps=None, skip_steps=None):
         'success': True,
         'critical_failure': False
     }
+    step_results = {}
+    pending = {}
 
     for step in SCRIPT_SEQUENCE:
         step_name = step['name']
@@ -180,45 +382,43 @@ def run_maintenance_sequence(steps=None, skip_steps=None):
 
         if step_name in skip_steps:
             log_and_print(f"SKIPPING: {step_name}")
-            results['steps'].append({
+            step_results[step_name] = {
                 'name': step_name,
                 'status': 'skipped',
                 'duration': 0
-            })
+            }
             continue
 
         if 'requires_config' in step:
             if not check_config_available(step['requires_config']):
                 log_and_print(f"SKIPPING: {step_name} (missing configuration)")
-                results['steps'].append({
+                step_results[step_name] = {
                     'name': step_name,
                     'status': 'skipped',
                     'reason': 'missing configuration'
-                })
+                }
                 continue
 
-        log_and_print(f"\n{'='*60}")
-        log_and_print(f"RUNNING: {step_name}")
-        log_and_print(f"{'='*60}")
+        pending[step_name] = step
 
-        start_time = time.time()
-
-        if 'module' in step:
-            success, output = run_script(step['module'], step.get('args'))
-        elif 'script' in step:
-            success, output = run_script(step['script'], timeout=3600)
-        else:
-            success, output = False, "No module or script specified"
+    # Steps that are filtered out or skipped do not block their dependents
+    done = {step['name'] for step in SCRIPT_SEQUENCE} - set(pending)
 
-        duration = time.time() - start_time
+    def start(step):
+        del pending[step['name']]
+        log_and_print(f"\n{'='*60}")
+        log_and_print(f"RUNNING: {step['name']}")
+        log_and_print(f"{'='*60}")
 
-        step_result = {
+    def finish(step, success, output, duration):
+        step_name = step['name']
+        done.add(step_name)
+        step_results[step_name] = {
             'name': step_name,
             'status': 'success' if success else 'failed',
             'duration': round(duration, 1),
             'output_preview': output[:500] if output else ''
         }
-        results['steps'].append(step_result)
 
         if success:
             log_and_print(f"COMPLETED: {step_name} ({duration:.1f}s)")
@@ -226,11 +426,36 @@ def run_maintenance_sequence(steps=None, skip_steps=None):
             log_and_print(f"FAILED: {step_name}", "error")
             results['success'] = False
 
-            if step.get('critical', False):
+            if step.get('critical', False) and not results['critical_failure']:
                 log_and_print("Critical step failed - stopping maintenance", "error")
                 results['critical_failure'] = True
+                pending.clear()
+
+    running = {}
+    with ThreadPoolExecutor(max_workers=MAX_CONCURRENT_STEPS) as subprocess_pool, \
+            ProcessPoolExecutor(max_workers=MAX_CONCURRENT_STEPS,
+                                initializer=init_step_worker) as step_pool:
+        while pending or running:
+            ready = [s for s in pending.values() if set(s.get('depends_on', [])) <= done]
+
+            for step in ready:
+                start(step)
+                inproc = 'module' in step and not step.get('isolate', False)
+                pool = step_pool if inproc else subprocess_pool
+                running[pool.submit(run_step, step)] = step
+
+            if not running:
                 break
 
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                step = running.pop(future)
+                try:
+                    finish(step, *future.result())
+                except Exception as e:
+                    finish(step, False, f"Step worker failed: {e}", 0)
+
+    results['steps'] = [step_results[s['name']] for s in SCRIPT_SEQUENCE if s['name'] in step_results]
     results['end_time'] = time.strftime("%Y-%m-%d %H:%M:%S")
     return results
 
@@ -0,0 +1,83 @@
+-- Health metrics procedure for DatabaseHealthSummary.py
+--
+-- Optional. Install once per geodatabase, then set
+-- HEALTH_SNAPSHOT_PROC=sde_mgmt.sp_health_snapshot in .env.
+--
+-- Each call returns one result set (ArcSDESQLExecute reads only the first),
+-- selected by @metric: 'size', 'fragmentation', 'repository', 'row_counts'.
+-- Runs as the owner, so callers need only EXECUTE on the procedure rather
+-- than VIEW DATABASE STATE. Keep the queries in step with the *_SQL
+-- constants in DatabaseHealthSummary.py.
+--
+-- Requires SQL Server 2016 SP1 or later (CREATE OR ALTER). Safe to re-run.
+
+IF SCHEMA_ID('sde_mgmt') IS NULL
+    EXEC('CREATE SCHEMA sde_mgmt');
+GO
+
+CREATE OR ALTER PROCEDURE sde_mgmt.sp_health_snapshot
+    @metric NVARCHAR(20),
+    @top_n INT = 20,
+    @threshold_percent FLOAT = 10
+WITH EXECUTE AS OWNER
+AS
+BEGIN
+    SET NOCOUNT ON;
+
+    IF @metric = N'size'
+    BEGIN
+        SELECT
+            DB_NAME() as database_name,
+            SUM(size * 8 * 1024) as total_bytes,
+            SUM(FILEPROPERTY(name, 'SpaceUsed') * 8 * 1024) as used_bytes
+        FROM sys.database_files;
+    END
+    ELSE IF @metric = N'fragmentation'
+    BEGIN
+        WITH candidates AS (
+            SELECT ps.object_id, ps.index_id
+            FROM sys.dm_db_partition_stats ps
+            INNER JOIN sys.indexes i ON ps.object_id = i.object_id AND ps.index_id = i.index_id
+            WHERE i.name IS NOT NULL
+            GROUP BY ps.object_id, ps.index_id
+            HAVING SUM(ps.in_row_data_page_count) > 100
+        )
+        SELECT TOP (@top_n)
+            OBJECT_NAME(ips.object_id) as table_name,
+            i.name as index_name,
+            ips.avg_fragmentation_in_percent as fragmentation_pct,
+            ips.page_count
+        FROM candidates c
+        CROSS APPLY sys.dm_db_index_physical_stats(DB_ID(), c.object_id, c.index_id, NULL, 'LIMITED') ips
+        INNER JOIN sys.indexes i ON ips.object_id = i.object_id AND ips.index_id = i.index_id
+        WHERE ips.avg_fragmentation_in_percent > @threshold_percent
+          AND ips.page_count > 100
+        ORDER BY fragmentation_pct DESC;
+    END
+    ELSE IF @metric = N'repository'
+    BEGIN
+        SELECT
+            (SELECT COUNT(*) FROM sde.SDE_table_registry),
+            (SELECT COUNT(*) FROM sde.SDE_layers),
+            (SELECT COUNT(*) FROM sde.SDE_versions),
+            (SELECT COUNT(*) FROM sde.SDE_states);
+    END
+    ELSE IF @metric = N'row_counts'
+    BEGIN
+        SELECT TOP (@top_n)
+            SCHEMA_NAME(t.schema_id) + '.' + t.name as table_name,
+            SUM(ps.row_count) as row_count
+        FROM sys.tables t
+        INNER JOIN sys.dm_db_partition_stats ps ON t.object_id = ps.object_id
+        WHERE ps.index_id IN (0, 1)
+          AND t.is_ms_shipped = 0
+          AND t.name NOT LIKE 'sde[_]%'
+          AND t.name NOT LIKE 'a[0-9]%'
+          AND t.name NOT LIKE 'd[0-9]%'
+        GROUP BY t.schema_id, t.name
+        ORDER BY row_count DESC;
+    END
+    ELSE
+        THROW 50000, 'Unknown @metric', 1;
+END
+GO
@@ -4,8 +4,9 @@ Creates XML workspace documents that can be used to recreate
 geodatabase schema (and optionally data).
 """
 
-import glob
+import heapq
 import os
+import shutil
 import sys
 import time
 
@@ -15,7 +16,7 @@ from dotenv import load_dotenv
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from sde_utils import (
     setup_logging, log_and_print, validate_paths,
-    get_sde_connections
+    get_sde_connections, get_max_workers, run_parallel
 )
 
 load_dotenv()
@@ -76,27 +77,129 @@ def rotate_backups(backup_dir, database_name, max_backups):
         database_name: Database name for pattern matching
         max_backups: Number of backups to retain
     """
-    pattern = os.path.join(backup_dir, f"*_{database_name}_schema.xml")
-    backups = sorted(glob.glob(pattern), reverse=True)
+    suffix = f"_{database_name}_schema.xml"
+    with os.scandir(backup_dir) as entries:
+        backups = [e.name for e in entries if e.name.endswith(suffix) and e.is_file()]
 
-    if len(backups) > max_backups:
-        for old_backup in backups[max_backups:]:
-            try:
-                os.remove(old_backup)
-                log_and_print(f"Rotated old backup: {os.path.basename(old_backup)}")
-            except OSError as e:
-                log_and_print(f"Error removing old backup: {e}", "error")
+    if len(backups) <= max_backups:
+        return
+
+    # Timestamp prefix sorts lexicographically, so the smallest names are the oldest
+    for old_backup in heapq.nsmallest(len(backups) - max_backups, backups):
+        try:
+            os.remove(os.path.join(backup_dir, old_backup))
+            log_and_print(f"Rotated old backup: {old_backup}")
+        except OSError as e:
+            log_and_print(f"Error removing old backup: {e}", "error")
+
+
+def get_database_identity(database_path):
+    """Identify the database and login an .sde connection points at.
+
+    The user and authentication mode are part of the identity because an
+    export only contains the objects the connecting login can see.
+
+    Args:
+        database_path: Path to .sde connection file
+
+    Returns:
+        Tuple of (server, instance, database, version, user,
+        authentication_mode), or the path itself if the connection
+        properties cannot be read
+    """
+    try:
+        props = arcpy.Describe(database_path).connectionProperties
+        return tuple(
+            str(getattr(props, key, '')).lower()
+            for key in ('server', 'instance', 'database', 'version', 'user', 'authentication_mode')
+        )
+    except Exception:
+        return database_path
+
+
+def group_by_database(sde_files):
+    """Group .sde connections that point at the same database as the same login.
 
+    Args:
+        sde_files: List of .sde file paths
+
+    Returns:
+        List of path lists; the first path in each list is exported
+    """
+    groups = {}
+    for sde_path in sde_files:
+        groups.setdefault(get_database_identity(sde_path), []).append(sde_path)
+    return list(groups.values())
+
+
+def copy_export(export_result, sde_name, output_dir):
+    """Reuse another connection's export for a connection to the same database.
+
+    Args:
+        export_result: Result dict from process_database for the exported connection
+        sde_name: Name of the duplicate connection
+        output_dir: Output directory for XML
+
+    Returns:
+        Dict with export results
+    """
+    if not export_result['success']:
+        return {'database': sde_name, 'success': False, 'path': None}
 
-def process_database(database_path, sde_name, output_dir, include_data, max_backups):
+    db_name = sde_name.replace('.sde', '')
+    output_filename = f"{export_result['timestamp']}_{db_name}_schema.xml"
+    output_path = os.path.join(output_dir, output_filename)
+
+    try:
+        shutil.copy2(export_result['path'], output_path)
+    except OSError as e:
+        log_and_print(f"Error copying export for {sde_name}: {e}", "error")
+        return {'database': sde_name, 'success': False, 'path': None}
+
+    log_and_print(f"Reused export of {export_result['database']} for {sde_name}: {output_filename}")
+
+    return {'database': sde_name, 'success': True, 'path': output_path}
+
+
+def finalize_group(group, export_result, output_dir, max_backups):
+    """Copy an export to the group's other connections and rotate backups.
+
+    Runs in the parent process as each export completes, so rotation
+    overlaps with exports still in progress.
+
+    Args:
+        group: List of .sde paths for one database (first one was exported)
+        export_result: Result dict from process_database, or None if it raised
+        output_dir: Output directory for XML
+        max_backups: Number of backups to retain
+
+    Returns:
+        List of result dicts, one per connection in the group
+    """
+    if export_result is None:
+        export_result = {'database': os.path.basename(group[0]), 'success': False, 'path': None}
+
+    results = [export_result]
+    for duplicate_path in group[1:]:
+        results.append(copy_export(export_result, os.path.basename(duplicate_path), output_dir))
+
+    for db_name in {r['database'].replace('.sde', '') for r in results if r['success']}:
+        rotate_backups(output_dir, db_name, max_backups)
+
+    return results
+
+
+def process_database(database_path, sde_name, output_dir, include_data):
     """Export schema for a single database.
 
+    Rotation is left to the caller so parallel exports never race on the
+    backup directory.
+
     Args:
         database_path: Path to .sde connection file
         sde_name: Name of database for logging
         output_dir: Output directory for XML
         include_data: Whether to include data
-        max_backups: Number of backups to retain
 
     Returns:
         Dict with export results
@@ -114,8 +217,6 @@ def process_database(database_path, sde_name, output_dir, include_data, max_back
         if validate_xml(output_path):
             size_mb = os.path.getsize(output_path) / (1024 * 1024)
             log_and_print(f"Exported: {output_filename} ({size_mb:.2f} MB)")
-
-            rotate_backups(output_dir, db_name, max_backups)
         else:
             log_and_print(f"Export validation failed", "error")
             success = False
@@ -125,7 +226,8 @@ def process_database(database_path, sde_name, output_dir, include_data, max_back
     return {
         'database': sde_name,
         'success': success,
-        'path': output_path if success else None
+        'path': output_path if success else None,
+        'timestamp': timestr
     }
 
 
@@ -156,11 +258,18 @@ def main():
         log_and_print(f"No .sde files found in {connection_dir}", "warning")
         return
 
+    # Export each database once, even when several connections point at it
+    groups = group_by_database(sde_files)
+    max_workers = get_max_workers(len(groups), env_var="XML_EXPORT_PARALLEL", default=4)
+    log_and_print(f"Exporting {len(groups)} database(s) with {max_workers} worker(s)")
+
     results = []
-    for sde_path in sde_files:
-        sde_name = os.path.basename(sde_path)
-        result = process_database(sde_path, sde_name, backup_dir, include_data, max_backups)
-        results.append(result)
+
+    def on_export(index, export_result):
+        results.extend(finalize_group(groups[index], export_result, backup_dir, max_backups))
+
+    tasks = [(group[0], os.path.basename(group[0]), backup_dir, include_data) for group in groups]
+    run_parallel(process_database, tasks, max_workers, on_result=on_export)
 
     success_count = sum(1 for r in results if r['success'])
     log_and_print(f"\nExported {success_count}/{len(results)} databases")
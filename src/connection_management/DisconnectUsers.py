@@ -14,11 +14,13 @@ from dotenv import load_dotenv
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from sde_utils import (
     setup_logging, log_and_print, validate_paths,
-    get_sde_connections
+    get_sde_connections, get_max_workers, run_parallel
 )
 
 load_dotenv()
 
+_ADMIN_NAMES = frozenset({'sde', 'admin', 'dbo'})
+
 
 def get_connected_users(database_path):
     """Get list of currently connected users.
@@ -49,6 +51,18 @@ def format_user_info(user):
     return f"ID={user.ID}, Name={user.Name}, Machine={user.ClientName}"
 
 
+def is_admin_user(user):
+    """Check whether a connection belongs to an admin account.
+
+    Args:
+        user: ArcPy user connection object
+
+    Returns:
+        True if the user name is sde, admin or dbo
+    """
+    return bool(user.Name) and user.Name.lower() in _ADMIN_NAMES
+
+
 def disconnect_user(database_path, user_id):
     """Disconnect a specific user by ID.
 
@@ -67,63 +81,102 @@ def disconnect_user(database_path, user_id):
         return False
 
 
-def disconnect_all(database_path, exclude_admin=True):
+def disconnect_users_batch(database_path, user_ids):
+    """Disconnect several users with a single DisconnectUser call.
+
+    Falls back to one call per user if the batched call fails.
+
+    Args:
+        database_path: Path to .sde connection file
+        user_ids: List of connection IDs to disconnect
+
+    Returns:
+        Tuple of (disconnected count, failed count)
+    """
+    if not user_ids:
+        return 0, 0
+
+    try:
+        arcpy.DisconnectUser(database_path, user_ids)
+        return len(user_ids), 0
+    except arcpy.ExecuteError as e:
+        log_and_print(f"Batch disconnect failed, retrying per user: {e}", "warning")
+
+    # arcpy is not thread-safe, so the fallback stays sequential
+    disconnected = sum(1 for user_id in user_ids if disconnect_user(database_path, user_id))
+    return disconnected, len(user_ids) - disconnected
+
+
+def disconnect_all(database_path, exclude_admin=True, users=None):
     """Disconnect all users from database.
 
     Args:
         database_path: Path to .sde connection file
         exclude_admin: Whether to exclude admin/sde users
+        users: Already-fetched ListUsers result (queried if None)
 
     Returns:
         Dict with counts of disconnected and failed
     """
-    users = get_connected_users(database_path)
+    if users is None:
+        users = get_connected_users(database_path)
     if not users:
         return {'disconnected': 0, 'failed': 0, 'excluded': 0}
 
-    disconnected = 0
-    failed = 0
     excluded = 0
+    user_ids = []
 
     for user in users:
         if exclude_admin:
-            if user.Name and user.Name.lower() in ['sde', 'admin', 'dbo']:
+            if is_admin_user(user):
                 log_and_print(f"Excluding admin user: {format_user_info(user)}")
                 excluded += 1
                 continue
 
         log_and_print(f"Disconnecting: {format_user_info(user)}")
-        if disconnect_user(database_path, user.ID):
-            disconnected += 1
-        else:
-            failed += 1
+        user_ids.append(user.ID)
+
+    disconnected, failed = disconnect_users_batch(database_path, user_ids)
 
     return {'disconnected': disconnected, 'failed': failed, 'excluded': excluded}
 
 
-def wait_for_disconnect(database_path, timeout_seconds=60):
+def wait_for_disconnect(database_path, timeout_seconds=60, initial_interval=0.25, max_interval=5):
     """Wait until all users are disconnected or timeout.
 
+    The polling interval adapts to progress: it halves while the user
+    count is dropping and doubles while it is stalled, so fast
+    disconnects are noticed quickly without hammering the server on
+    slow ones.
+
     Args:
         database_path: Path to .sde connection file
         timeout_seconds: Maximum wait time
+        initial_interval: First polling interval in seconds
+        max_interval: Upper bound for the polling interval in seconds
 
     Returns:
         True if all disconnected, False if timeout
     """
-    check_interval = 5
-    elapsed = 0
+    deadline = time.monotonic() + timeout_seconds
+    check_interval = initial_interval
+    previous_count = None
 
-    while elapsed < timeout_seconds:
+    while time.monotonic() < deadline:
         users = get_connected_users(database_path)
-        non_admin = [u for u in users if u.Name.lower() not in ['sde', 'admin', 'dbo']]
+        non_admin = [u for u in users if not is_admin_user(u)]
 
         if not non_admin:
             return True
 
+        if previous_count is not None and len(non_admin) < previous_count:
+            check_interval = max(check_interval / 2, initial_interval)
+        elif previous_count is not None:
+            check_interval = min(check_interval * 2, max_interval)
+        previous_count = len(non_admin)
+
         log_and_print(f"Waiting... {len(non_admin)} user(s) still connected")
-        time.sleep(check_interval)
-        elapsed += check_interval
+        time.sleep(min(check_interval, max(0, deadline - time.monotonic())))
 
     return False
 
@@ -151,7 +204,7 @@ def process_database(database_path, sde_name, exclude_admin, timeout_seconds):
     for user in users:
         log_and_print(f"  {format_user_info(user)}")
 
-    result = disconnect_all(database_path, exclude_admin)
+    result = disconnect_all(database_path, exclude_admin, users)
     log_and_print(f"Disconnected: {result['disconnected']}, Failed: {result['failed']}, Excluded: {result['excluded']}")
 
     if result['disconnected'] > 0:
@@ -187,9 +240,11 @@ def main():
         log_and_print(f"No .sde files found in {connection_dir}", "warning")
         return
 
-    for sde_path in sde_files:
-        sde_name = os.path.basename(sde_path)
-        process_database(sde_path, sde_name, exclude_admin, timeout)
+    max_workers = get_max_workers(len(sde_files))
+    log_and_print(f"Processing {len(sde_files)} database(s) with {max_workers} worker(s)")
+
+    tasks = [(sde_path, os.path.basename(sde_path), exclude_admin, timeout) for sde_path in sde_files]
+    run_parallel(process_database, tasks, max_workers)
 
     log_and_print("DONE!")
 
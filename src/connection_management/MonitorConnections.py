@@ -14,7 +14,7 @@ from dotenv import load_dotenv
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from sde_utils import (
     setup_logging, log_and_print, validate_paths,
-    get_sde_connections, execute_sql
+    get_sde_connections, execute_sql, get_max_workers, run_parallel
 )
 
 load_dotenv()
@@ -49,16 +49,26 @@ def get_connection_details_arcpy(database_path):
     return connections
 
 
-def get_connection_details_sql(database_path):
+def get_connection_details_sql(database_path, min_minutes=None):
     """Get detailed connection info from SQL Server DMVs.
 
     Args:
         database_path: Path to .sde connection file
+        min_minutes: If set, only return sessions connected at least this
+                     many minutes (filtered server-side, unordered)
 
     Returns:
-        List of connection dicts with SQL Server details
+        List of connection dicts with SQL Server details, or None if
+        the DMV query failed
     """
-    sql = """
+    if min_minutes is None:
+        filter_clause = ""
+        order_clause = "ORDER BY connection_minutes DESC"
+    else:
+        filter_clause = f"AND DATEDIFF(minute, login_time, GETDATE()) >= {int(min_minutes)}"
+        order_clause = ""
+
+    sql = f"""
     SELECT
         session_id,
         login_name,
@@ -71,7 +81,8 @@ def get_connection_details_sql(database_path):
     FROM sys.dm_exec_sessions
     WHERE database_id = DB_ID()
       AND session_id > 50
-    ORDER BY connection_minutes DESC
+      {filter_clause}
+    {order_clause}
     """
 
     try:
@@ -93,84 +104,87 @@ def get_connection_details_sql(database_path):
             })
         return connections
     except Exception:
-        return []
+        return None
 
 
-def check_long_running(connections, threshold_minutes):
+def check_long_running(connections, threshold_minutes, sorted_desc=False):
     """Identify connections exceeding duration threshold.
 
     Args:
         connections: List of connection dicts
         threshold_minutes: Alert threshold in minutes
+        sorted_desc: Connections are ordered by connection_minutes descending,
+                     so the scan can stop at the first one under the threshold
 
     Returns:
         List of long-running connections
     """
-    return [c for c in connections if (c.get('connection_minutes') or 0) >= threshold_minutes]
+    if not sorted_desc:
+        return [c for c in connections if (c.get('connection_minutes') or 0) >= threshold_minutes]
 
+    long_running = []
+    for c in connections:
+        if (c.get('connection_minutes') or 0) < threshold_minutes:
+            break
+        long_running.append(c)
+    return long_running
 
-def generate_report(database_name, connections, long_running):
-    """Generate formatted connection report.
+
+def write_report(fp, database_name, connections, long_running):
+    """Write formatted connection report to a file-like object.
 
     Args:
+        fp: Writable text stream (open file or sys.stdout)
         database_name: Name of database
         connections: All connections
         long_running: Long-running connections
-
-    Returns:
-        Formatted report string
     """
-    lines = [
-        f"Connection Report: {database_name}",
-        "=" * 60,
-        f"Total Connections: {len(connections)}",
-        f"Long-Running (alert): {len(long_running)}",
-        ""
-    ]
+    fp.write(f"Connection Report: {database_name}\n")
+    fp.write("=" * 60 + "\n")
+    fp.write(f"Total Connections: {len(connections)}\n")
+    fp.write(f"Long-Running (alert): {len(long_running)}\n\n")
 
     if connections:
-        lines.append("Active Connections:")
-        lines.append("-" * 40)
+        fp.write("Active Connections:\n")
+        fp.write("-" * 40 + "\n")
         for conn in connections:
             if 'session_id' in conn:
-                lines.append(
+                fp.write(
                     f"  Session {conn['session_id']}: {conn['login_name']} "
-                    f"from {conn['host_name']} ({conn['connection_minutes']} min)"
+                    f"from {conn['host_name']} ({conn['connection_minutes']} min)\n"
                 )
             else:
-                lines.append(
-                    f"  ID {conn['id']}: {conn['name']} from {conn['machine']}"
-                )
-        lines.append("")
+                fp.write(f"  ID {conn['id']}: {conn['name']} from {conn['machine']}\n")
+        fp.write("\n")
 
     if long_running:
-        lines.append("ALERT - Long-Running Connections:")
-        lines.append("-" * 40)
+        fp.write("ALERT - Long-Running Connections:\n")
+        fp.write("-" * 40 + "\n")
         for conn in long_running:
-            lines.append(
+            fp.write(
                 f"  ** {conn.get('login_name', conn.get('name'))} - "
-                f"{conn.get('connection_minutes', 'N/A')} minutes"
+                f"{conn.get('connection_minutes', 'N/A')} minutes\n"
             )
 
-    return "\n".join(lines)
 
-
-def export_report(report, output_dir, database_name):
+def export_report(output_dir, database_name, report_title, connections, long_running):
     """Export report to file.
 
     Args:
-        report: Text report string
         output_dir: Output directory
         database_name: Database name for filename
+        report_title: Database name shown in the report header
+        connections: All connections
+        long_running: Long-running connections
     """
     timestr = time.strftime("%Y-%m-%d_%H%M%S")
     txt_path = os.path.join(output_dir, f"{timestr}_{database_name}_connections.txt")
-    with open(txt_path, 'w') as f:
-        f.write(report)
+    with open(txt_path, 'w', buffering=1 << 16) as f:
+        write_report(f, report_title, connections, long_running)
     log_and_print(f"Report saved: {txt_path}")
 
 
-def process_database(database_path, sde_name, threshold_minutes, report_dir):
+def process_database(database_path, sde_name, threshold_minutes, report_dir, long_running_only=False):
     """Monitor connections for a single database.
 
     Args:
@@ -178,27 +192,35 @@ def process_database(database_path, sde_name, threshold_minutes, report_dir):
         sde_name: Name of database for logging
         threshold_minutes: Long-connection threshold
         report_dir: Directory for reports (optional)
+        long_running_only: Only fetch connections over the threshold
 
     Returns:
         Dict with monitoring results
     """
     log_and_print(f"Monitoring connections for: {sde_name}")
 
-    connections = get_connection_details_sql(database_path)
-    if not connections:
-        connections = get_connection_details_arcpy(database_path)
+    if long_running_only:
+        # The server applies the threshold, so every returned row is long-running
+        connections = get_connection_details_sql(database_path, min_minutes=threshold_minutes)
+        if connections is None:
+            connections = check_long_running(get_connection_details_arcpy(database_path), threshold_minutes)
+        long_running = connections
+    else:
+        connections = get_connection_details_sql(database_path)
+        from_dmv = bool(connections)  # DMV rows arrive ORDER BY connection_minutes DESC
+        if not connections:
+            connections = get_connection_details_arcpy(database_path)
+        long_running = check_long_running(connections, threshold_minutes, sorted_desc=from_dmv)
 
     log_and_print(f"Found {len(connections)} connection(s)")
 
-    long_running = check_long_running(connections, threshold_minutes)
     if long_running:
         log_and_print(f"WARNING: {len(long_running)} long-running connection(s) detected!", "warning")
 
-    report = generate_report(sde_name, connections, long_running)
-    print(report)
+    write_report(sys.stdout, sde_name, connections, long_running)
 
     if report_dir:
-        export_report(report, report_dir, sde_name.replace('.sde', ''))
+        export_report(report_dir, sde_name.replace('.sde', ''), sde_name, connections, long_running)
 
     return {
         'database': sde_name,
@@ -214,6 +236,7 @@ def main():
     log_dir = os.environ.get('SDE_LOG_DIR')
     threshold = int(os.environ.get('LONG_CONNECTION_THRESHOLD_MINUTES', '60'))
     report_dir = os.environ.get('REPORT_OUTPUT_DIR', log_dir)
+    long_running_only = os.environ.get('LONG_RUNNING_ONLY', 'false').lower() == 'true'
 
     validate_paths(connection_dir=connection_dir, log_dir=log_dir)
     setup_logging(log_dir, "MonitorConnections")
@@ -229,11 +252,12 @@ def main():
         log_and_print(f"No .sde files found in {connection_dir}", "warning")
         return
 
-    all_results = []
-    for sde_path in sde_files:
-        sde_name = os.path.basename(sde_path)
-        result = process_database(sde_path, sde_name, threshold, report_dir)
-        all_results.append(result)
+    max_workers = get_max_workers(len(sde_files))
+    log_and_print(f"Processing {len(sde_files)} database(s) with {max_workers} worker(s)")
+
+    tasks = [(sde_path, os.path.basename(sde_path), threshold, report_dir, long_running_only)
+             for sde_path in sde_files]
+    all_results = [r for r in run_parallel(process_database, tasks, max_workers) if r]
 
     total_connections = sum(r['total_connections'] for r in all_results)
     total_long = sum(r['long_running'] for r in all_results)
@@ -4,8 +4,10 @@ Identifies and optionally repairs invalid geometries in SDE geodatabases.
 """
 
 import os
+import re
 import sys
 import time
+from collections import defaultdict, namedtuple
 
 import arcpy
 from dotenv import load_dotenv
@@ -13,30 +15,108 @@ from dotenv import load_dotenv
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from sde_utils import (
     setup_logging, log_and_print, validate_paths,
-    get_sde_connections, execute_sql
+    get_sde_connections, execute_sql, get_max_workers, run_parallel,
+    sql_literal
 )
 
 load_dotenv()
 
+# Feature classes with more errors than this report a count only
+MAX_LISTED_ERRORS = 100
+
+# Last name segment after any path separator or schema dot
+_TABLE_RE = re.compile(r'[^\\/.]+$')
+
+# Write buffer for geometry reports
+REPORT_BUFFER_SIZE = 1 << 20
+
+# arcpy.da.Editor per workspace, reused across edit sessions; see get_editor
+_editors = {}
+
+# Per-feature-class metadata, parsed once per run
+FCInfo = namedtuple('FCInfo', 'name full_path table_name owner_table is_versioned')
+
+# CheckGeometry output; the memory workspace is private to each process
+SCRATCH_TABLE = r"memory\geom_check"
+
+# Feature class listings per database_path; cleared at the start of each run
+_fc_cache = {}
+
+
+FEATURE_CLASS_CATALOG_SQL = """
+SELECT i.Name, parent.Name
+FROM sde.GDB_ITEMS i
+JOIN sde.GDB_ITEMTYPES t ON i.Type = t.UUID
+LEFT JOIN sde.GDB_ITEMRELATIONSHIPS r
+  ON r.DestID = i.UUID
+  AND r.Type IN (SELECT UUID FROM sde.GDB_ITEMRELATIONSHIPTYPES
+                 WHERE Name = 'DatasetInFeatureDataset')
+LEFT JOIN sde.GDB_ITEMS parent ON parent.UUID = r.OriginID
+WHERE t.Name = 'Feature Class'
+"""
+
 
 def get_feature_classes(database_path):
     """Get all feature classes including those in feature datasets.
 
+    Reads the geodatabase catalog in one query, falling back to
+    walking the workspace with ArcPy if the catalog cannot be queried.
+    Listings are cached per database until clear_feature_class_cache().
+
+    Args:
+        database_path: Path to .sde connection file
+
+    Returns:
+        List of feature class paths
+    """
+    if database_path not in _fc_cache:
+        _fc_cache[database_path] = read_feature_classes(database_path)
+    return list(_fc_cache[database_path])
+
+
+def clear_feature_class_cache():
+    """Forget cached feature class listings so schema changes are picked up."""
+    _fc_cache.clear()
+
+
+def read_feature_classes(database_path):
+    """Read feature classes from the catalog, or ArcPy if that fails.
+
     Args:
         database_path: Path to .sde connection file
 
     Returns:
         List of feature class paths
     """
-    arcpy.env.workspace = database_path
-    feature_classes = list(arcpy.ListFeatureClasses() or [])
+    try:
+        result = execute_sql(database_path, FEATURE_CLASS_CATALOG_SQL)
+    except Exception as e:
+        log_and_print(f"Catalog query failed, listing feature classes with ArcPy: {e}", "warning")
+        return list_feature_classes(database_path)
 
-    for dataset in (arcpy.ListDatasets("", "Feature") or []):
-        arcpy.env.workspace = os.path.join(database_path, dataset)
-        for fc in (arcpy.ListFeatureClasses() or []):
-            feature_classes.append(os.path.join(dataset, fc))
+    if not result or result is True:
+        return []
 
-    arcpy.env.workspace = database_path
+    feature_classes = []
+    for name, dataset in result:
+        feature_classes.append(os.path.join(dataset, name) if dataset else name)
+    return feature_classes
+
+
+def list_feature_classes(database_path):
+    """List feature classes with a single arcpy.da.Walk traversal.
+
+    Args:
+        database_path: Path to .sde connection file
+
+    Returns:
+        List of feature class paths relative to the database
+    """
+    feature_classes = []
+    for dirpath, _dirnames, filenames in arcpy.da.Walk(database_path, datatype="FeatureClass"):
+        dataset = os.path.relpath(dirpath, database_path)
+        for fc in filenames:
+            feature_classes.append(fc if dataset == os.curdir else os.path.join(dataset, fc))
     return feature_classes
 
 
@@ -46,6 +126,7 @@ def extract_table_name(fc_name):
     Handles various naming formats:
     - 'Campos_Survey.DBO.Planimetrics\\Campos_Survey.DBO.Railway' -> 'Railway'
     - 'Planimetrics\\Railway' -> 'Railway'
+    - 'Planimetrics/Railway' -> 'Railway'
     - 'Campos_Survey.DBO.Railway' -> 'Railway'
     - 'Railway' -> 'Railway'
 
@@ -55,8 +136,94 @@ def extract_table_name(fc_name):
     Returns:
         Base table name for SQL queries
     """
-    fc_part = fc_name.split('\\')[-1]
-    return fc_part.split('.')[-1]
+    match = _TABLE_RE.search(fc_name)
+    return match.group(0) if match else fc_name
+
+
+def class_key(fc_path):
+    """Normalize a feature class path to its last component for matching."""
+    return fc_path.replace('/', '\\').split('\\')[-1].lower()
+
+
+def get_versioned_tables(database_path):
+    """Get all tables registered as versioned with one query.
+
+    Args:
+        database_path: Path to .sde connection file
+
+    Returns:
+        Set of lowercase table names, or None if the registry could not be read
+    """
+    sql = "SELECT table_name FROM sde.SDE_table_registry WHERE object_flags & 8 = 8"
+    try:
+        result = execute_sql(database_path, sql)
+    except Exception as e:
+        log_and_print(f"Error reading versioned tables: {e}", "warning")
+        return None
+
+    if not result or result is True:
+        return set()
+    if not isinstance(result, list):
+        return {str(result).lower()}
+    return {(row[0] if isinstance(row, (list, tuple)) else row).lower() for row in result}
+
+
+def get_table_row_counts(database_path):
+    """Get estimated row counts for every user table from partition stats.
+
+    Args:
+        database_path: Path to .sde connection file
+
+    Returns:
+        Dict mapping lowercase 'owner.table' to row count, or None if the
+        stats could not be read
+    """
+    sql = """
+    SELECT SCHEMA_NAME(t.schema_id), t.name, SUM(ps.row_count)
+    FROM sys.tables t
+    INNER JOIN sys.dm_db_partition_stats ps ON ps.object_id = t.object_id
+    WHERE ps.index_id IN (0, 1)
+    GROUP BY t.schema_id, t.name
+    """
+    try:
+        result = execute_sql(database_path, sql)
+    except Exception as e:
+        log_and_print(f"Error reading table row counts: {e}", "warning")
+        return None
+
+    if not result or result is True:
+        return None
+    return {f"{row[0]}.{row[1]}".lower(): int(row[2] or 0) for row in result}
+
+
+def owner_table(fc_name):
+    """Get the lowercase 'owner.table' form of a feature class name."""
+    return '.'.join(class_key(fc_name).split('.')[-2:])
+
+
+def describe_feature_classes(database_path, feature_classes):
+    """Build FCInfo records for a database's feature classes.
+
+    Paths and names are parsed once here; versioning comes from a
+    single registry query, with a per-class lookup as fallback.
+
+    Args:
+        database_path: Path to .sde connection file
+        feature_classes: Feature class names from get_feature_classes
+
+    Returns:
+        Dict mapping feature class name to FCInfo, in catalog order
+    """
+    versioned_tables = get_versioned_tables(database_path)
+    fc_info = {}
+    for fc in feature_classes:
+        table_name = extract_table_name(fc)
+        if versioned_tables is None:
+            is_versioned = is_feature_class_versioned(database_path, fc)
+        else:
+            is_versioned = table_name.lower() in versioned_tables
+        fc_info[fc] = FCInfo(fc, os.path.join(database_path, fc), table_name, owner_table(fc), is_versioned)
+    return fc_info
 
 
 def is_feature_class_versioned(database_path, fc_name):
@@ -74,7 +241,7 @@ def is_feature_class_versioned(database_path, fc_name):
     sql = f"""
     SELECT COUNT(*)
     FROM sde.SDE_table_registry
-    WHERE table_name = '{table_name}'
+    WHERE table_name = {sql_literal(table_name)}
       AND object_flags & 8 = 8
     """
     try:
@@ -88,6 +255,28 @@ def is_feature_class_versioned(database_path, fc_name):
         return True  # Assume versioned if we can't determine (safer)
 
 
+def get_scratch_table():
+    """Get the CheckGeometry output table name.
+
+    Output goes to the process-local memory workspace, so checks skip
+    scratch geodatabase I/O and parallel workers cannot collide. Each
+    check deletes its output table after reading it.
+
+    Returns:
+        Path to a table in the memory workspace
+    """
+    return SCRATCH_TABLE
+
+
+def discard_scratch_table(out_table):
+    """Remove a scratch output table left behind by a failed check."""
+    try:
+        if arcpy.Exists(out_table):
+            arcpy.Delete_management(out_table)
+    except Exception:
+        pass
+
+
 def run_check_geometry(fc_path, fc_name):
     """Run CheckGeometry and collect results.
 
@@ -105,67 +294,269 @@ def run_check_geometry(fc_path, fc_name):
         'errors': []
     }
 
+    out_table = get_scratch_table()
     try:
-        out_table = arcpy.CreateScratchName("geom_check", data_type="ArcInfoTable",
-                                            workspace=arcpy.env.scratchGDB)
         arcpy.CheckGeometry_management(fc_path, out_table)
 
-        error_count = int(arcpy.GetCount_management(out_table)[0])
+        # Count and collect in one cursor pass rather than a separate GetCount tool run
+        error_count = 0
+        errors = []
+        with arcpy.da.SearchCursor(out_table, ["FEATURE_ID", "PROBLEM"]) as cursor:
+            for feature_id, problem in cursor:
+                error_count += 1
+                if error_count <= MAX_LISTED_ERRORS:
+                    errors.append({'feature_id': feature_id, 'problem': problem})
+
         result['checked'] = True
         result['error_count'] = error_count
-
-        if 0 < error_count <= 100:
-            with arcpy.da.SearchCursor(out_table, ["FEATURE_ID", "PROBLEM"]) as cursor:
-                result['errors'] = [{'feature_id': row[0], 'problem': row[1]} for row in cursor]
+        if error_count <= MAX_LISTED_ERRORS:
+            result['errors'] = errors
 
         arcpy.Delete_management(out_table)
 
     except arcpy.ExecuteError as e:
         log_and_print(f"Error checking {fc_name}: {e}", "error")
+        discard_scratch_table(out_table)
 
     return result
 
 
-def check_geometry(database_path, fc_name, is_versioned=None):
-    """Run CheckGeometry and return problem summary.
+def run_check_geometry_batch(fc_paths):
+    """Run one CheckGeometry call over several feature classes.
 
-    Handles both versioned and non-versioned feature classes.
-    For versioned FCs, uses edit session approach to avoid ERROR 001259.
+    Errors are attributed to feature classes via the output table's
+    CLASS field. Falls back to one call per feature class if the
+    batched call fails.
+
+    Args:
+        fc_paths: Dict mapping feature class name to full path
+
+    Returns:
+        Dict mapping feature class name to check result dict
+    """
+    # CLASS holds the full path; the last path component identifies the feature class
+    by_class = {class_key(path): name for name, path in fc_paths.items()}
+    class_names = {}
+    counts = defaultdict(int)
+    errors = defaultdict(list)
+
+    out_table = get_scratch_table()
+    try:
+        arcpy.CheckGeometry_management(list(fc_paths.values()), out_table)
+
+        with arcpy.da.SearchCursor(out_table, ["CLASS", "FEATURE_ID", "PROBLEM"]) as cursor:
+            for fc_class, feature_id, problem in cursor:
+                if fc_class not in class_names:
+                    class_names[fc_class] = by_class.get(class_key(fc_class))
+                name = class_names[fc_class]
+                if name is None:
+                    continue
+                counts[name] += 1
+                if counts[name] <= MAX_LISTED_ERRORS:
+                    errors[name].append({'feature_id': feature_id, 'problem': problem})
+
+        arcpy.Delete_management(out_table)
+
+    except arcpy.ExecuteError as e:
+        log_and_print(f"Batched geometry check failed, checking individually: {e}", "warning")
+        discard_scratch_table(out_table)
+        return {name: run_check_geometry(path, name) for name, path in fc_paths.items()}
+
+    return {
+        name: {
+            'feature_class': name,
+            'checked': True,
+            'error_count': counts[name],
+            'errors': errors[name] if counts[name] <= MAX_LISTED_ERRORS else []
+        }
+        for name in fc_paths
+    }
+
+
+def get_editor(database_path):
+    """Get this process's Editor for a workspace, creating it on first use.
+
+    An Editor can start and stop many edit sessions, so one per
+    workspace saves reopening the .sde connection for every session.
 
     Args:
         database_path: Path to .sde connection file
-        fc_name: Feature class name
-        is_versioned: Optional bool indicating versioning status.
-                      If None, will be determined via SQL query.
 
     Returns:
-        Dict with check results
+        arcpy.da.Editor for the workspace
     """
-    if is_versioned is None:
-        is_versioned = is_feature_class_versioned(database_path, fc_name)
+    if database_path not in _editors:
+        _editors[database_path] = arcpy.da.Editor(database_path)
+    return _editors[database_path]
 
-    fc_path = os.path.join(database_path, fc_name)
 
-    if not is_versioned:
-        return run_check_geometry(fc_path, fc_name)
+def discard_editor(database_path):
+    """Drop a cached Editor after a failure so the next session starts fresh."""
+    _editors.pop(database_path, None)
+
+
+def run_in_edit_session(database_path, label, func, *args):
+    """Run func inside a non-saving edit session on the workspace.
 
+    Versioned feature classes need an edit session for CheckGeometry
+    to avoid ERROR 001259.
+
+    Args:
+        database_path: Path to .sde connection file
+        label: Name used in log messages
+        func: Function to execute
+        *args: Arguments to pass to func
+
+    Returns:
+        Result of func, or None if the edit session failed
+    """
     editor = None
-    result = {'feature_class': fc_name, 'checked': False, 'error_count': 0, 'errors': []}
+    result = None
 
     try:
-        editor = arcpy.da.Editor(database_path)
+        editor = get_editor(database_path)
         editor.startEditing(with_undo=False, multiuser_mode=True)
-        result = run_check_geometry(fc_path, fc_name)
+        result = func(*args)
         editor.stopEditing(save_changes=False)
 
     except arcpy.ExecuteError as e:
+        discard_editor(database_path)
+        error_msg = str(e).lower()
+        if "lock" in error_msg or "exclusive" in error_msg:
+            log_and_print(f"Cannot acquire edit lock for {label}: {e}", "warning")
+        else:
+            log_and_print(f"Edit session error for {label}: {e}", "error")
+    except Exception as e:
+        discard_editor(database_path)
+        log_and_print(f"Unexpected error checking {label}: {e}", "error")
+    finally:
+        if editor is not None:
+            try:
+                if editor.isEditing:
+                    editor.stopEditing(save_changes=False)
+            except Exception:
+                pass
+
+    return result
+
+
+def check_geometry_chunk(label, fc_paths):
+    """Worker entry point: check one chunk of non-versioned feature classes.
+
+    Args:
+        label: Chunk description used in worker failure messages
+        fc_paths: Dict mapping feature class name to full path
+
+    Returns:
+        Dict mapping feature class name to check result dict
+    """
+    return run_check_geometry_batch(fc_paths)
+
+
+def check_geometry_batch(database_path, versioning, check_workers=1, fc_paths=None):
+    """Check geometry for many feature classes with as few tool calls as possible.
+
+    Non-versioned feature classes are checked in one CheckGeometry call,
+    or split across check_workers processes; versioned ones in a single
+    call inside one edit session.
+
+    Args:
+        database_path: Path to .sde connection file
+        versioning: Dict mapping feature class name to is_versioned bool
+        check_workers: Number of processes for the non-versioned check
+        fc_paths: Optional dict mapping feature class name to full path
+
+    Returns:
+        Dict mapping feature class name to check result dict
+    """
+    if fc_paths is None:
+        fc_paths = {fc: os.path.join(database_path, fc) for fc in versioning}
+    plain = {fc: fc_paths[fc] for fc, v in versioning.items() if not v}
+    versioned = {fc: fc_paths[fc] for fc, v in versioning.items() if v}
+
+    results = {}
+    workers = max(1, min(check_workers, len(plain)))
+    if workers > 1:
+        items = list(plain.items())
+        chunks = [dict(items[i::workers]) for i in range(workers)]
+        tasks = [(f"{os.path.basename(database_path)} chunk {i + 1}/{workers}", chunk)
+                 for i, chunk in enumerate(chunks)]
+        for chunk, chunk_results in zip(chunks, run_parallel(check_geometry_chunk, tasks, workers)):
+            for fc in chunk:
+                results[fc] = (chunk_results or {}).get(
+                    fc, {'feature_class': fc, 'checked': False, 'error_count': 0, 'errors': []}
+                )
+    elif plain:
+        results = run_check_geometry_batch(plain)
+
+    if versioned:
+        versioned_results = run_in_edit_session(
+            database_path, f"{len(versioned)} versioned feature class(es)",
+            run_check_geometry_batch, versioned
+        ) or {}
+        for fc in versioned:
+            results[fc] = versioned_results.get(
+                fc, {'feature_class': fc, 'checked': False, 'error_count': 0, 'errors': []}
+            )
+
+    return results
+
+
+def check_and_repair_versioned(database_path, fc_paths):
+    """Check, repair and re-check versioned feature classes in one edit session.
+
+    Each repair runs in its own edit operation so a failure only rolls
+    back that feature class; all successful repairs are saved together.
+
+    Args:
+        database_path: Path to .sde connection file
+        fc_paths: Dict mapping versioned feature class name to full path
+
+    Returns:
+        Tuple of (checks, outcomes): checks maps feature class name to
+        check result dict; outcomes maps each feature class that needed
+        repair to (success, message, recheck result dict or None)
+    """
+    checks = {}
+    outcomes = {}
+    editor = None
+
+    try:
+        editor = get_editor(database_path)
+        editor.startEditing(with_undo=False, multiuser_mode=True)
+
+        checks = run_check_geometry_batch(fc_paths)
+        for fc, check in checks.items():
+            if check['error_count'] == 0:
+                continue
+            editor.startOperation()
+            try:
+                arcpy.RepairGeometry_management(fc_paths[fc], "DELETE_NULL")
+                editor.stopOperation()
+                outcomes[fc] = (True, "Repaired via edit session", run_check_geometry(fc_paths[fc], fc))
+            except arcpy.ExecuteError as e:
+                try:
+                    editor.abortOperation()
+                except Exception:
+                    pass
+                outcomes[fc] = (False, f"Repair failed: {e}", None)
+
+        editor.stopEditing(save_changes=True)
+
+    except arcpy.ExecuteError as e:
+        discard_editor(database_path)
         error_msg = str(e).lower()
         if "lock" in error_msg or "exclusive" in error_msg:
-            log_and_print(f"Cannot acquire edit lock for {fc_name}: {e}", "warning")
+            message = f"Cannot acquire edit lock: {e}"
         else:
-            log_and_print(f"Edit session error for {fc_name}: {e}", "error")
+            message = f"Edit session error: {e}"
+        log_and_print(f"Versioned check/repair failed for {os.path.basename(database_path)}: {message}", "error")
+        # Nothing was saved, so no repair in this session took effect
+        outcomes = {fc: (False, message, None) for fc in outcomes}
     except Exception as e:
-        log_and_print(f"Unexpected error checking {fc_name}: {e}", "error")
+        discard_editor(database_path)
+        log_and_print(f"Unexpected error in versioned check/repair: {e}", "error")
+        outcomes = {fc: (False, f"Unexpected error: {e}", None) for fc in outcomes}
     finally:
         if editor is not None:
             try:
@@ -174,35 +565,73 @@ def check_geometry(database_path, fc_name, is_versioned=None):
             except Exception:
                 pass
 
+    for fc in fc_paths:
+        checks.setdefault(fc, {'feature_class': fc, 'checked': False, 'error_count': 0, 'errors': []})
+    return checks, outcomes
+
+
+def check_geometry(database_path, fc_name, is_versioned=None, fc_path=None):
+    """Run CheckGeometry and return problem summary.
+
+    Handles both versioned and non-versioned feature classes.
+    For versioned FCs, uses edit session approach to avoid ERROR 001259.
+
+    Args:
+        database_path: Path to .sde connection file
+        fc_name: Feature class name
+        is_versioned: Optional bool indicating versioning status.
+                      If None, will be determined via SQL query.
+        fc_path: Optional full path to the feature class
+
+    Returns:
+        Dict with check results
+    """
+    if is_versioned is None:
+        is_versioned = is_feature_class_versioned(database_path, fc_name)
+
+    if fc_path is None:
+        fc_path = os.path.join(database_path, fc_name)
+
+    if not is_versioned:
+        return run_check_geometry(fc_path, fc_name)
+
+    result = run_in_edit_session(database_path, fc_name, run_check_geometry, fc_path, fc_name)
+    if result is None:
+        result = {'feature_class': fc_name, 'checked': False, 'error_count': 0, 'errors': []}
     return result
 
 
-def repair_geometry_versioned(database_path, fc_name):
+def repair_geometry_versioned(database_path, fc_name, fc_path=None, verify=False):
     """Repair geometry on versioned feature class using edit session.
 
     Starts an edit session on DEFAULT version, performs repair,
-    and saves the edit session.
+    optionally re-checks inside the same session, and saves the edit session.
 
     Args:
         database_path: Path to .sde connection file
         fc_name: Feature class name
+        fc_path: Optional full path to the feature class
+        verify: Re-run CheckGeometry after the repair, before saving
 
     Returns:
-        Tuple of (success: bool, message: str)
+        Tuple of (success: bool, message: str, recheck result dict or None)
     """
-    fc_path = os.path.join(database_path, fc_name)
+    if fc_path is None:
+        fc_path = os.path.join(database_path, fc_name)
     editor = None
 
     try:
-        editor = arcpy.da.Editor(database_path)
+        editor = get_editor(database_path)
         editor.startEditing(with_undo=False, multiuser_mode=True)
         editor.startOperation()
 
         try:
             arcpy.RepairGeometry_management(fc_path, "DELETE_NULL")
             editor.stopOperation()
+            # Re-check in the open session rather than starting a second one
+            after = run_check_geometry(fc_path, fc_name) if verify else None
             editor.stopEditing(save_changes=True)
-            return True, "Repaired via edit session"
+            return True, "Repaired via edit session", after
 
         except arcpy.ExecuteError as e:
             try:
@@ -210,18 +639,20 @@ def repair_geometry_versioned(database_path, fc_name):
             except Exception:
                 pass
             editor.stopEditing(save_changes=False)
-            return False, f"Repair failed: {e}"
+            return False, f"Repair failed: {e}", None
 
     except arcpy.ExecuteError as e:
+        discard_editor(database_path)
         error_msg = str(e)
         if "lock" in error_msg.lower() or "exclusive" in error_msg.lower():
-            return False, f"Cannot acquire edit lock: {e}"
+            return False, f"Cannot acquire edit lock: {e}", None
         elif "001259" in error_msg:
-            return False, f"Edit session approach failed: {e}"
+            return False, f"Edit session approach failed: {e}", None
         else:
-            return False, f"Edit session error: {e}"
+            return False, f"Edit session error: {e}", None
     except Exception as e:
-        return False, f"Unexpected error: {e}"
+        discard_editor(database_path)
+        return False, f"Unexpected error: {e}", None
     finally:
         if editor is not None:
             try:
@@ -231,7 +662,7 @@ def repair_geometry_versioned(database_path, fc_name):
                 pass
 
 
-def repair_geometry(database_path, fc_name, is_versioned=None):
+def repair_geometry(database_path, fc_name, is_versioned=None, fc_path=None):
     """Repair geometry issues in feature class.
 
     Handles both versioned and non-versioned feature classes.
@@ -242,18 +673,20 @@ def repair_geometry(database_path, fc_name, is_versioned=None):
         fc_name: Feature class name
         is_versioned: Optional bool indicating versioning status.
                       If None, will be determined via SQL query.
+        fc_path: Optional full path to the feature class
 
     Returns:
         True if successful, False otherwise
     """
-    fc_path = os.path.join(database_path, fc_name)
+    if fc_path is None:
+        fc_path = os.path.join(database_path, fc_name)
 
     if is_versioned is None:
         is_versioned = is_feature_class_versioned(database_path, fc_name)
 
     if is_versioned:
         log_and_print(f"  {fc_name} is versioned - using edit session approach")
-        success, message = repair_geometry_versioned(database_path, fc_name)
+        success, message, _ = repair_geometry_versioned(database_path, fc_name, fc_path)
         if not success:
             log_and_print(f"  Skipping {fc_name}: {message}", "warning")
         return success
@@ -266,21 +699,31 @@ def repair_geometry(database_path, fc_name, is_versioned=None):
             return False
 
 
-def process_feature_class(database_path, fc_name, auto_repair):
+def process_feature_class(database_path, fc_name, auto_repair, is_versioned=None, check_result=None,
+                          verify_after_repair=False, fc_path=None, repair_outcome=None):
     """Check and optionally repair a single feature class.
 
     Args:
         database_path: Path to .sde connection file
         fc_name: Feature class name
         auto_repair: Whether to automatically repair issues
+        is_versioned: Optional bool indicating versioning status
+        check_result: Optional result from a batched geometry check
+        verify_after_repair: Re-check geometry when the repair reported warnings
+        fc_path: Optional full path to the feature class
+        repair_outcome: Optional (success, message, recheck) from a versioned
+            repair already done by check_and_repair_versioned
 
     Returns:
         Dict with processing results
     """
     # Check versioning once and pass it to avoid multiple SQL queries
-    is_versioned = is_feature_class_versioned(database_path, fc_name)
+    if is_versioned is None:
+        is_versioned = is_feature_class_versioned(database_path, fc_name)
 
-    result = check_geometry(database_path, fc_name, is_versioned=is_versioned)
+    result = check_result
+    if result is None:
+        result = check_geometry(database_path, fc_name, is_versioned=is_versioned, fc_path=fc_path)
     result['is_versioned'] = is_versioned
 
     if result['error_count'] > 0:
@@ -289,14 +732,32 @@ def process_feature_class(database_path, fc_name, auto_repair):
 
         if auto_repair:
             log_and_print(f"  Repairing {fc_name}...")
-            if repair_geometry(database_path, fc_name, is_versioned=is_versioned):
-                after = check_geometry(database_path, fc_name, is_versioned=is_versioned)
+            after = None
+            if is_versioned:
+                # DELETE_NULL can leave issues on versioned data, so always re-check,
+                # inside the repair's own edit session
+                log_and_print(f"  {fc_name} is versioned - using edit session approach")
+                if repair_outcome is None:
+                    repair_outcome = repair_geometry_versioned(database_path, fc_name, fc_path, verify=True)
+                success, message, after = repair_outcome
+                if not success:
+                    log_and_print(f"  Skipping {fc_name}: {message}", "warning")
+            else:
+                success = repair_geometry(database_path, fc_name, is_versioned=False, fc_path=fc_path)
+                # A clean repair run leaves no warnings; only re-scan partial repairs
+                if success and verify_after_repair and arcpy.GetMessages(1):
+                    after = run_check_geometry(fc_path or os.path.join(database_path, fc_name), fc_name)
+
+            if success:
                 result['repaired'] = True
-                result['errors_after_repair'] = after['error_count']
-                if after['error_count'] == 0:
-                    log_and_print(f"  {fc_name}: All errors repaired")
+                if after is not None and after['checked']:
+                    result['errors_after_repair'] = after['error_count']
+                    if after['error_count'] == 0:
+                        log_and_print(f"  {fc_name}: All errors repaired")
+                    else:
+                        log_and_print(f"  {fc_name}: {after['error_count']} errors remain", "warning")
                 else:
-                    log_and_print(f"  {fc_name}: {after['error_count']} errors remain", "warning")
+                    log_and_print(f"  {fc_name}: Repair completed (unverified)")
             else:
                 result['repaired'] = False
                 result['repair_skipped'] = True
@@ -306,7 +767,8 @@ def process_feature_class(database_path, fc_name, auto_repair):
     return result
 
 
-def process_database(database_path, sde_name, auto_repair, report_dir):
+def process_database(database_path, sde_name, auto_repair, report_dir, verify_after_repair=False,
+                     check_workers=1):
     """Check/repair all feature classes in a database.
 
     Args:
@@ -314,6 +776,9 @@ def process_database(database_path, sde_name, auto_repair, report_dir):
         sde_name: Name of database for logging
         auto_repair: Whether to automatically repair
         report_dir: Directory for report output
+        verify_after_repair: Re-check repaired feature classes that reported warnings
+        check_workers: Number of processes for checking and repairing
+            non-versioned feature classes
 
     Returns:
         Dict with processing summary
@@ -323,7 +788,7 @@ def process_database(database_path, sde_name, auto_repair, report_dir):
     feature_classes = get_feature_classes(database_path)
     if not feature_classes:
         log_and_print(f"No feature classes found in {sde_name}")
-        return {'database': sde_name, 'checked': 0, 'errors': 0}
+        return {'database': sde_name, 'checked': 0, 'fc_with_errors': 0, 'total_errors': 0, 'results': []}
 
     log_and_print(f"Found {len(feature_classes)} feature class(es)")
 
@@ -332,8 +797,58 @@ def process_database(database_path, sde_name, auto_repair, report_dir):
     versioned_count = 0
     skipped_count = 0
 
+    fc_info = describe_feature_classes(database_path, feature_classes)
+    versioning = {fc: info.is_versioned for fc, info in fc_info.items()}
+    fc_paths = {fc: info.full_path for fc, info in fc_info.items()}
+
+    # Versioned tables can hold rows in their delta tables while the base table is
+    # empty, so only unversioned feature classes are skipped on an empty base table
+    empty = set()
+    row_counts = get_table_row_counts(database_path)
+    if row_counts is not None:
+        empty = {fc for fc, info in fc_info.items()
+                 if not info.is_versioned and row_counts.get(info.owner_table) == 0}
+        if empty:
+            log_and_print(f"Skipping {len(empty)} empty feature class(es)")
+
+    to_check = {fc: v for fc, v in versioning.items() if fc not in empty}
+    # With auto-repair, versioned classes are checked and repaired in one shared edit session
+    repair_outcomes = {}
+    if auto_repair:
+        versioned_paths = {fc: fc_paths[fc] for fc, v in to_check.items() if v}
+        checks = check_geometry_batch(
+            database_path, {fc: v for fc, v in to_check.items() if not v}, check_workers, fc_paths
+        )
+        if versioned_paths:
+            versioned_checks, repair_outcomes = check_and_repair_versioned(database_path, versioned_paths)
+            checks.update(versioned_checks)
+    else:
+        checks = check_geometry_batch(database_path, to_check, check_workers, fc_paths)
+
+    # Non-versioned repairs touch independent tables and can run side by side;
+    # versioned repairs each hold an edit session and stay sequential
+    repaired = {}
+    to_repair = [fc for fc in to_check
+                 if auto_repair and not versioning[fc] and checks[fc]['error_count'] > 0]
+    repair_workers = max(1, min(check_workers, len(to_repair)))
+    if repair_workers > 1:
+        tasks = [(database_path, fc, auto_repair, False, checks[fc], verify_after_repair, fc_paths[fc])
+                 for fc in to_repair]
+        for fc, result in zip(to_repair, run_parallel(process_feature_class, tasks, repair_workers)):
+            if result is not None:
+                repaired[fc] = result
+
     for fc in feature_classes:
-        result = process_feature_class(database_path, fc, auto_repair)
+        if fc in empty:
+            results.append({'feature_class': fc, 'checked': False, 'error_count': 0, 'errors': [],
+                            'is_versioned': False, 'repaired': False, 'empty': True})
+            continue
+        result = repaired.get(fc)
+        if result is None:
+            result = process_feature_class(database_path, fc, auto_repair,
+                                           is_versioned=versioning[fc], check_result=checks[fc],
+                                           verify_after_repair=verify_after_repair, fc_path=fc_paths[fc],
+                                           repair_outcome=repair_outcomes.get(fc))
         results.append(result)
         total_errors += result['error_count']
         if result.get('is_versioned'):
@@ -343,7 +858,7 @@ def process_database(database_path, sde_name, auto_repair, report_dir):
 
     fc_with_errors = sum(1 for r in results if r['error_count'] > 0)
 
-    log_and_print(f"Checked {len(feature_classes)} feature classes ({versioned_count} versioned)")
+    log_and_print(f"Checked {len(to_check)} feature classes ({versioned_count} versioned)")
     log_and_print(f"Found {total_errors} total geometry errors in {fc_with_errors} feature class(es)")
     if skipped_count > 0:
         log_and_print(f"Skipped {skipped_count} feature class(es) due to repair failures", "warning")
@@ -351,7 +866,8 @@ def process_database(database_path, sde_name, auto_repair, report_dir):
     if report_dir and total_errors > 0:
         timestr = time.strftime("%Y-%m-%d_%H%M%S")
         report_path = os.path.join(report_dir, f"{timestr}_{sde_name.replace('.sde', '')}_geometry.txt")
-        with open(report_path, 'w') as f:
+        # Large buffer: one flush for typical reports, even on networked log drives
+        with open(report_path, 'w', buffering=REPORT_BUFFER_SIZE) as f:
             f.write(f"Geometry Report: {sde_name}\n")
             f.write("=" * 60 + "\n\n")
             for r in results:
@@ -379,26 +895,31 @@ def main():
     log_dir = os.environ.get('SDE_LOG_DIR')
     auto_repair = os.environ.get('AUTO_REPAIR', 'false').lower() == 'true'
     report_dir = os.environ.get('GEOMETRY_REPORT_DIR', log_dir)
+    verify_after_repair = os.environ.get('VERIFY_AFTER_REPAIR', 'false').lower() == 'true'
+    check_workers = int(os.environ.get('GEOMETRY_CHECK_WORKERS', '1'))
 
     validate_paths(connection_dir=connection_dir, log_dir=log_dir)
     setup_logging(log_dir, "RepairGeometry")
+    clear_feature_class_cache()
 
     log_and_print(f"Auto-repair: {'enabled' if auto_repair else 'disabled (report only)'}")
 
-    workspace = arcpy.GetParameterAsText(0)
-    if workspace:
-        arcpy.env.workspace = workspace
-
     sde_files = get_sde_connections(connection_dir)
     if not sde_files:
         log_and_print(f"No .sde files found in {connection_dir}", "warning")
         return
 
-    all_results = []
-    for sde_path in sde_files:
-        sde_name = os.path.basename(sde_path)
-        result = process_database(sde_path, sde_name, auto_repair, report_dir)
-        all_results.append(result)
+    workspace = arcpy.GetParameterAsText(0)
+    if workspace:
+        arcpy.env.workspace = workspace
+
+    max_workers = get_max_workers(len(sde_files))
+    log_and_print(f"Processing {len(sde_files)} database(s) with {max_workers} worker(s)")
+
+    tasks = [(sde_path, os.path.basename(sde_path), auto_repair, report_dir, verify_after_repair,
+              check_workers)
+             for sde_path in sde_files]
+    all_results = [r for r in run_parallel(process_database, tasks, max_workers) if r]
 
     total_errors = sum(r['total_errors'] for r in all_results)
     log_and_print(f"\nTotal geometry errors across all databases: {total_errors}")
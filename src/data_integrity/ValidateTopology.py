@@ -4,8 +4,12 @@ Validates all topology datasets in SDE geodatabases and generates
 error reports.
 """
 
+import atexit
+import json
 import os
+import shutil
 import sys
+import tempfile
 import time
 
 import arcpy
@@ -14,11 +18,45 @@ from dotenv import load_dotenv
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from sde_utils import (
     setup_logging, log_and_print, validate_paths,
-    get_sde_connections
+    get_sde_connections, run_parallel, execute_sql, parameterize_sql, get_server_time
 )
 
 load_dotenv()
 
+_desc_cache = {}
+_scratch_gdb = None
+
+
+class TopologyResult:
+    """Validation outcome for one topology.
+
+    Uses __slots__ rather than a dict since one is kept per topology for
+    the whole run.
+    """
+
+    __slots__ = ('topology', 'dataset', 'validated', 'skipped', 'error_count',
+                 'dirty_area_count', 'exports', 'info')
+
+    def __init__(self, topology, dataset, validated=False, skipped=False, error_count=0,
+                 dirty_area_count=0, exports=None, info=None):
+        self.topology = topology
+        self.dataset = dataset
+        self.validated = validated
+        self.skipped = skipped
+        self.error_count = error_count
+        self.dirty_area_count = dirty_area_count
+        self.exports = exports if exports is not None else {}
+        self.info = info
+
+
+def _describe(path):
+    """Return arcpy.Describe(path), reusing an earlier result for the same path."""
+    desc = _desc_cache.get(path)
+    if desc is None:
+        desc = arcpy.Describe(path)
+        _desc_cache[path] = desc
+    return desc
+
 
 def get_topologies(database_path):
     """Find all topology datasets in geodatabase.
@@ -29,23 +67,17 @@ def get_topologies(database_path):
     Returns:
         List of topology paths
     """
-    arcpy.env.workspace = database_path
     topologies = []
 
-    datasets = arcpy.ListDatasets("", "Feature") or []
-    for dataset in datasets:
-        dataset_path = os.path.join(database_path, dataset)
-        arcpy.env.workspace = dataset_path
-
-        topos = arcpy.ListDatasets("", "Topology") or []
-        for topo in topos:
+    # One catalog traversal instead of a ListDatasets call per feature dataset
+    for dirpath, _dirnames, filenames in arcpy.da.Walk(database_path, datatype="Topology"):
+        for topo in filenames:
             topologies.append({
                 'name': topo,
-                'dataset': dataset,
-                'path': os.path.join(dataset_path, topo)
+                'dataset': os.path.basename(dirpath),
+                'path': os.path.join(dirpath, topo)
             })
 
-    arcpy.env.workspace = database_path
     return topologies
 
 
@@ -59,7 +91,7 @@ def get_topology_info(topology_path):
         Dict with topology information
     """
     try:
-        desc = arcpy.Describe(topology_path)
+        desc = _describe(topology_path)
         return {
             'name': desc.name,
             'cluster_tolerance': desc.clusterTolerance,
@@ -70,6 +102,87 @@ def get_topology_info(topology_path):
         return {'name': '', 'cluster_tolerance': 0, 'feature_class_count': 0, 'feature_classes': []}
 
 
+WRITTEN_TABLES_SQL = """
+SELECT r.owner, r.table_name
+FROM sde.SDE_table_registry r
+WHERE EXISTS (
+    SELECT 1 FROM sys.dm_db_index_usage_stats u
+    WHERE u.database_id = DB_ID()
+      AND u.last_user_update >= CONVERT(DATETIME, @since, 126)
+      AND u.object_id IN (
+          OBJECT_ID(QUOTENAME(r.owner) + '.' + QUOTENAME(r.table_name)),
+          OBJECT_ID(QUOTENAME(r.owner) + '.' + QUOTENAME('a' + CAST(r.registration_id AS VARCHAR(10)))),
+          OBJECT_ID(QUOTENAME(r.owner) + '.' + QUOTENAME('D' + CAST(r.registration_id AS VARCHAR(10))))
+      )
+)
+"""
+
+RESTARTED_SINCE_SQL = """
+SELECT CASE WHEN sqlserver_start_time >= CONVERT(DATETIME, @since, 126) THEN 1 ELSE 0 END
+FROM sys.dm_os_sys_info
+"""
+
+
+def get_written_tables(database_path, since):
+    """Get registered tables whose base, adds or deletes table was written since a time.
+
+    sys.dm_db_index_usage_stats is cleared when SQL Server restarts, so
+    after a restart the answer is unknown.
+
+    Args:
+        database_path: Path to .sde connection file
+        since: Server time (ISO 8601) recorded at the start of the last run
+
+    Returns:
+        Set of lowercase 'owner.table' names, or None if unknown
+    """
+    try:
+        if execute_sql(database_path, parameterize_sql(RESTARTED_SINCE_SQL, since=since)) != 0:
+            return None
+        result = execute_sql(database_path, parameterize_sql(WRITTEN_TABLES_SQL, since=since))
+    except Exception as e:
+        log_and_print(f"Error reading table usage stats: {e}", "warning")
+        return None
+    if not result or result is True:
+        return set()
+    return {f"{row[0]}.{row[1]}".lower() for row in result}
+
+
+def topology_unchanged(topology_info, written_tables):
+    """Check whether no feature class in a topology has been written.
+
+    Args:
+        topology_info: Topology info dict
+        written_tables: Set from get_written_tables
+
+    Returns:
+        True if every member feature class is absent from written_tables
+    """
+    try:
+        members = list(_describe(topology_info['path']).featureClassNames)
+    except Exception:
+        return False
+    if not members:
+        return False
+    return not any('.'.join(name.lower().split('.')[-2:]) in written_tables for name in members)
+
+
+def load_validation_state(state_path):
+    """Read the last run's server time and per-topology error counts, or None."""
+    try:
+        with open(state_path) as f:
+            state = json.load(f)
+        return state if state.get('server_time') else None
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def save_validation_state(state_path, server_time, error_counts):
+    """Persist the run's start time and error count per validated topology path."""
+    with open(state_path, 'w') as f:
+        json.dump({'server_time': server_time, 'topologies': error_counts}, f)
+
+
 def validate_topology(database_path, topology_info, validate_extent="FULL_EXTENT"):
     """Validate topology and return error summary.
 
@@ -79,15 +192,9 @@ def validate_topology(database_path, topology_info, validate_extent="FULL_EXTENT
         validate_extent: "FULL_EXTENT" or specific extent
 
     Returns:
-        Dict with validation results
+        TopologyResult
     """
-    result = {
-        'topology': topology_info['name'],
-        'dataset': topology_info['dataset'],
-        'validated': False,
-        'error_count': 0,
-        'dirty_area_count': 0
-    }
+    result = TopologyResult(topology_info['name'], topology_info['dataset'])
 
     try:
         if validate_extent == "FULL_EXTENT":
@@ -95,11 +202,13 @@ def validate_topology(database_path, topology_info, validate_extent="FULL_EXTENT
         else:
             arcpy.ValidateTopology_management(topology_info['path'])
 
-        result['validated'] = True
+        result.validated = True
 
-        desc = arcpy.Describe(topology_info['path'])
+        # Validation changes errorCount, so drop any pre-validation Describe
+        _desc_cache.pop(topology_info['path'], None)
+        desc = _describe(topology_info['path'])
         if hasattr(desc, 'errorCount'):
-            result['error_count'] = desc.errorCount
+            result.error_count = desc.errorCount
 
     except arcpy.ExecuteError as e:
         log_and_print(f"Error validating {topology_info['name']}: {e}", "error")
@@ -107,39 +216,120 @@ def validate_topology(database_path, topology_info, validate_extent="FULL_EXTENT
     return result
 
 
+def get_scratch_gdb():
+    """Return a local file geodatabase private to this process.
+
+    arcpy.env.scratchGDB is shared by every process of the same user, so
+    parallel workers would contend for its locks; each process creates
+    its own instead, once.
+
+    Returns:
+        Path to the scratch file geodatabase
+    """
+    global _scratch_gdb
+    if _scratch_gdb is None:
+        folder = tempfile.mkdtemp(prefix="topology_errors_")
+        atexit.register(shutil.rmtree, folder, True)
+        arcpy.CreateFileGDB_management(folder, "scratch.gdb")
+        _scratch_gdb = os.path.join(folder, "scratch.gdb")
+    return _scratch_gdb
+
+
 def export_topology_errors(topology_info, output_gdb):
     """Export topology errors to feature classes.
 
+    Errors are exported to a local scratch geodatabase and then copied to
+    output_gdb, so a network share sees three bulk copies instead of
+    feature-by-feature writes.
+
     Args:
         topology_info: Topology info dict
-        output_gdb: Output geodatabase for error features
+        output_gdb: Output geodatabase for error features, already checked
+            to exist by main() (empty to skip)
 
     Returns:
         Dict with export paths
     """
-    if not output_gdb or not os.path.exists(output_gdb):
+    if not output_gdb:
         return {}
 
     try:
         base_name = f"{topology_info['dataset']}_{topology_info['name']}"
+        scratch = get_scratch_gdb()
 
         arcpy.ExportTopologyErrors_management(
             topology_info['path'],
-            output_gdb,
+            scratch,
             base_name
         )
 
-        return {
-            'point_errors': os.path.join(output_gdb, f"{base_name}_point"),
-            'line_errors': os.path.join(output_gdb, f"{base_name}_line"),
-            'poly_errors': os.path.join(output_gdb, f"{base_name}_poly")
-        }
+        exports = {}
+        for key, suffix in (('point_errors', '_point'), ('line_errors', '_line'), ('poly_errors', '_poly')):
+            source = os.path.join(scratch, base_name + suffix)
+            target = os.path.join(output_gdb, base_name + suffix)
+            arcpy.Copy_management(source, target)
+            arcpy.Delete_management(source)
+            exports[key] = target
+
+        return exports
     except arcpy.ExecuteError as e:
         log_and_print(f"Error exporting topology errors: {e}", "error")
         return {}
 
 
-def process_database(database_path, sde_name, validate_extent, error_gdb):
+def validate_or_skip(database_path, topo, validate_extent, last_error_count=None, written_tables=None):
+    """Validate one topology, or skip it if unchanged since the last run.
+
+    Args:
+        database_path: Path to .sde connection file
+        topo: Topology dict from get_topologies
+        validate_extent: Validation extent option
+        last_error_count: Error count from the last run's validation, if any
+        written_tables: Tables written since the last run (None = unknown)
+
+    Returns:
+        TopologyResult
+    """
+    if (last_error_count is not None and written_tables is not None
+            and topology_unchanged(topo, written_tables)):
+        log_and_print(f"  Unchanged since last validation: {topo['dataset']}/{topo['name']}")
+        result = TopologyResult(topo['name'], topo['dataset'], validated=True, skipped=True,
+                                error_count=last_error_count)
+    else:
+        log_and_print(f"  Validating: {topo['dataset']}/{topo['name']}")
+        result = validate_topology(database_path, topo, validate_extent)
+
+    result.info = get_topology_info(topo['path'])  # Reuses the post-validation Describe
+
+    if result.validated:
+        log_and_print(f"    {topo['dataset']}/{topo['name']} errors: {result.error_count}")
+
+    return result
+
+
+def validate_dataset(database_path, topos, validate_extent, last_counts, written_tables=None):
+    """Validate the topologies of one feature dataset, one after another.
+
+    Topologies in the same feature dataset share locks, so they are never
+    validated at the same time. Module-level so it can run in a worker
+    process.
+
+    Args:
+        database_path: Path to .sde connection file
+        topos: Topology dicts from get_topologies, all in one dataset
+        validate_extent: Validation extent option
+        last_counts: Dict of topology path -> last run's error count
+        written_tables: Tables written since the last run (None = unknown)
+
+    Returns:
+        List of TopologyResult in topos order
+    """
+    return [validate_or_skip(database_path, topo, validate_extent, last_counts.get(topo['path']), written_tables)
+            for topo in topos]
+
+
+def process_database(database_path, sde_name, validate_extent, error_gdb, topology_workers=1,
+                     state_dir=None):
     """Validate all topologies in a database.
 
     Args:
@@ -147,6 +337,9 @@ def process_database(database_path, sde_name, validate_extent, error_gdb):
         sde_name: Name of database for logging
         validate_extent: Validation extent option
         error_gdb: Output GDB for errors (optional)
+        topology_workers: Maximum topologies validated at once
+        state_dir: If set, skip topologies whose feature classes have not
+            been written since the last run (tracked in a JSON file here)
 
     Returns:
         Dict with processing summary
@@ -156,33 +349,60 @@ def process_database(database_path, sde_name, validate_extent, error_gdb):
     topologies = get_topologies(database_path)
     if not topologies:
         log_and_print(f"No topologies found in {sde_name}")
-        return {'database': sde_name, 'topologies': 0, 'errors': 0}
+        return {'database': sde_name, 'topologies': 0, 'topos_with_errors': 0, 'total_errors': 0, 'results': []}
 
     log_and_print(f"Found {len(topologies)} topology dataset(s)")
 
-    results = []
-    total_errors = 0
-
+    state_path = None
+    run_started = None
+    last_counts = {}
+    written_tables = None
+    if state_dir:
+        state_path = os.path.join(state_dir, f".topology_validation_{sde_name.replace('.sde', '')}.json")
+        run_started = get_server_time(database_path)
+        last_state = load_validation_state(state_path)
+        if last_state:
+            last_counts = last_state.get('topologies') or {}
+            written_tables = get_written_tables(database_path, last_state['server_time'])
+
+    # Validation is server-bound, and topologies in different feature datasets
+    # never share locks, so each dataset goes to its own process
+    by_dataset = {}
     for topo in topologies:
-        log_and_print(f"  Validating: {topo['dataset']}/{topo['name']}")
-
-        info = get_topology_info(topo['path'])
-        result = validate_topology(database_path, topo, validate_extent)
-
-        if result['validated']:
-            log_and_print(f"    Errors: {result['error_count']}")
-            total_errors += result['error_count']
-
-            if result['error_count'] > 0 and error_gdb:
-                exports = export_topology_errors(topo, error_gdb)
-                result['exports'] = exports
-                if exports:
-                    log_and_print(f"    Errors exported to: {error_gdb}")
-
-        result['info'] = info
-        results.append(result)
+        by_dataset.setdefault(topo['dataset'], []).append(topo)
+    workers = max(1, min(topology_workers, len(by_dataset)))
+    tasks = [(database_path, topos, validate_extent, last_counts, written_tables)
+             for topos in by_dataset.values()]
+    validated = {}
+    for topos, dataset_results in zip(by_dataset.values(), run_parallel(validate_dataset, tasks, workers)):
+        for topo, r in zip(topos, dataset_results or []):
+            validated[topo['path']] = r
+    raw_results = [validated.get(topo['path']) for topo in topologies]
+
+    # Exports all write to the same output geodatabase, so run them one at a time
+    if error_gdb:
+        for topo, r in zip(topologies, raw_results):
+            if r and r.validated and r.error_count > 0:
+                r.exports = export_topology_errors(topo, error_gdb)
+                if r.exports:
+                    log_and_print(f"    {topo['dataset']}/{topo['name']} errors exported to: {error_gdb}")
 
-    topos_with_errors = sum(1 for r in results if r['error_count'] > 0)
+    results = []
+    error_counts = {}
+    total_errors = 0
+    topos_with_errors = 0
+    for topo, r in zip(topologies, raw_results):
+        if not r:
+            continue
+        results.append(r)
+        if r.validated:
+            error_counts[topo['path']] = r.error_count
+        if r.error_count > 0:
+            total_errors += r.error_count
+            topos_with_errors += 1
+
+    if state_path and run_started:
+        save_validation_state(state_path, run_started, error_counts)
 
     log_and_print(f"Validated {len(topologies)} topologies, {topos_with_errors} with errors")
 
@@ -201,11 +421,16 @@ def main():
     log_dir = os.environ.get('SDE_LOG_DIR')
     validate_extent = os.environ.get('VALIDATE_EXTENT', 'FULL_EXTENT')
     error_gdb = os.environ.get('TOPOLOGY_ERROR_OUTPUT_GDB', '')
+    topology_workers = int(os.environ.get('TOPOLOGY_PARALLEL', '1'))
+    incremental = os.environ.get('TOPOLOGY_INCREMENTAL', 'false').lower() == 'true'
 
     validate_paths(connection_dir=connection_dir, log_dir=log_dir)
     setup_logging(log_dir, "ValidateTopology")
 
     log_and_print(f"Validation extent: {validate_extent}")
+    if error_gdb and not os.path.exists(error_gdb):
+        log_and_print(f"Error export GDB not found, skipping export: {error_gdb}", "warning")
+        error_gdb = ''
     if error_gdb:
         log_and_print(f"Error export GDB: {error_gdb}")
 
@@ -218,10 +443,11 @@ def main():
         log_and_print(f"No .sde files found in {connection_dir}", "warning")
         return
 
+    state_dir = log_dir if incremental else None
     all_results = []
     for sde_path in sde_files:
         sde_name = os.path.basename(sde_path)
-        result = process_database(sde_path, sde_name, validate_extent, error_gdb)
+        result = process_database(sde_path, sde_name, validate_extent, error_gdb, topology_workers, state_dir)
         all_results.append(result)
 
     total_topos = sum(r['topologies'] for r in all_results)
@@ -4,6 +4,7 @@ Performs automated maintenance operations on SDE geodatabases:
 analyze, compress, rebuild indexes, analyze (second pass).
 """
 
+import json
 import os
 import sys
 
@@ -13,52 +14,228 @@ from dotenv import load_dotenv
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from sde_utils import (
     setup_logging, log_and_print, validate_paths,
-    get_sde_connections, get_data_list, process_with_error_handling
+    get_sde_connections, get_data_list, process_with_error_handling,
+    get_max_workers, run_parallel, get_state_snapshot, get_unchanged_versioned,
+    close_sql_connections, execute_sql, parameterize_sql, get_server_time
 )
 
 load_dotenv()
 
 
-def analyze(database_path):
+def analyze(database_path, data_list=None):
     """Run AnalyzeDatasets on all datasets in the database."""
-    data_list = get_data_list(database_path)
+    if data_list is None:
+        data_list = get_data_list(database_path)
+    if not data_list:
+        return
     arcpy.AnalyzeDatasets_management(
         database_path, "NO_SYSTEM", data_list,
         "ANALYZE_BASE", "ANALYZE_DELTA", "ANALYZE_ARCHIVE"
     )
 
 
+def analyze_shard(database_path, data_list):
+    """Analyze one shard of datasets in a worker process; True on success."""
+    analyze(database_path, data_list)
+    return True
+
+
+def analyze_parallel(database_path, data_list, workers):
+    """Run AnalyzeDatasets over shards of data_list in parallel processes.
+
+    Each shard updates statistics on its own connection, so SQL Server
+    overlaps the per-table work; this trades server CPU for wall time.
+
+    Args:
+        database_path: Path to .sde connection file
+        data_list: Dataset names to analyze
+        workers: Number of shards (and worker processes)
+
+    Raises:
+        RuntimeError: If any shard failed
+    """
+    workers = max(1, min(workers, len(data_list)))
+    if workers == 1:
+        analyze(database_path, data_list)
+        return
+    tasks = [(database_path, data_list[i::workers]) for i in range(workers)]
+    if not all(run_parallel(analyze_shard, tasks, workers)):
+        raise RuntimeError("AnalyzeDatasets failed for one or more shards")
+
+
 def compress(database_path):
     """Compress the database to remove versioning artifacts."""
+    # Our own cached SQL session would otherwise pin states during compress
+    close_sql_connections(database_path)
     arcpy.Compress_management(database_path)
 
 
-def rebuild(database_path):
+def rebuild(database_path, data_list=None):
     """Rebuild indexes on all datasets in the database."""
-    data_list = get_data_list(database_path)
+    if data_list is None:
+        data_list = get_data_list(database_path)
+    if not data_list:
+        return
     arcpy.RebuildIndexes_management(database_path, "NO_SYSTEM", data_list, "ALL")
 
 
-def process_database(database_path, sde_name):
-    """Run all maintenance operations on a single database."""
+def filter_unchanged(data_list, unchanged):
+    """Drop datasets whose 'owner.table' suffix is in the unchanged set.
+
+    Args:
+        data_list: Dataset names (e.g. 'DB.DBO.Roads')
+        unchanged: Set of lowercase 'owner.table' names
+
+    Returns:
+        Filtered list of dataset names
+    """
+    return [d for d in data_list if '.'.join(d.lower().split('.')[-2:]) not in unchanged]
+
+
+def get_unchanged_unversioned(database_path, since):
+    """Get unversioned registered tables with no writes since a server time.
+
+    sys.dm_db_index_usage_stats is cleared when SQL Server restarts, so
+    nothing is reported unchanged if the server started after `since`.
+
+    Args:
+        database_path: Path to .sde connection file
+        since: Server time (ISO 8601) recorded at the start of the last run
+
+    Returns:
+        Set of lowercase 'owner.table' names
+    """
+    sql = """
+    SELECT r.owner, r.table_name
+    FROM sde.SDE_table_registry r
+    WHERE r.object_flags & 8 = 0
+      AND (SELECT sqlserver_start_time FROM sys.dm_os_sys_info) < CONVERT(DATETIME, @since, 126)
+      AND NOT EXISTS (
+          SELECT 1 FROM sys.dm_db_index_usage_stats u
+          WHERE u.database_id = DB_ID()
+            AND u.object_id = OBJECT_ID(QUOTENAME(r.owner) + '.' + QUOTENAME(r.table_name))
+            AND u.last_user_update >= CONVERT(DATETIME, @since, 126)
+      )
+    """
+    result = execute_sql(database_path, parameterize_sql(sql, since=since))
+    if not result or result is True:
+        return set()
+    return {f"{row[0]}.{row[1]}".lower() for row in result}
+
+
+def load_last_state(state_path):
+    """Read the state saved by the last successful run.
+
+    Returns:
+        Dict with 'state_id' and optionally 'server_time', or None
+    """
+    try:
+        with open(state_path) as f:
+            state = json.load(f)
+        return state if 'state_id' in state else None
+    except (OSError, ValueError, TypeError):
+        return None
+
+
+def save_last_state(state_path, state_id, server_time=None):
+    """Persist the state ID reached, and server time at the start of, a successful run."""
+    with open(state_path, 'w') as f:
+        json.dump({'state_id': state_id, 'server_time': server_time}, f)
+
+
+def run_operation(operation_name, operation_func, args, sde_name):
+    """Run one maintenance operation with logging.
+
+    Args:
+        operation_name: Operation label for logging
+        operation_func: Function to execute
+        args: Tuple of arguments for operation_func
+        sde_name: Name of database for logging
+
+    Returns:
+        True if successful, False otherwise
+    """
+    log_and_print(f"{operation_name}: {sde_name}")
+    success, error = process_with_error_handling(
+        f"{operation_name.lower()} {sde_name}",
+        operation_func,
+        *args
+    )
+    if not success:
+        log_and_print(error, "error")
+    return success
+
+
+def process_database(database_path, sde_name, skip_redundant_analyze=False, state_dir=None,
+                     analyze_workers=1):
+    """Run all maintenance operations on a single database.
+
+    Args:
+        database_path: Path to .sde connection file
+        sde_name: Name of database for logging
+        skip_redundant_analyze: Skip the second analyze pass when compress
+            and rebuild left SDE_states unchanged
+        state_dir: If set, skip datasets with no edits since the last
+            successful run (tracked in a JSON file in this directory)
+        analyze_workers: Parallel AnalyzeDatasets shards per analyze pass
+    """
+    # Compress removes state rows, not schema, so one catalog listing serves every pass
+    success, data_list = process_with_error_handling(
+        f"listing datasets {sde_name}", get_data_list, database_path
+    )
+    if not success:
+        log_and_print(data_list, "error")
+        return False
+
+    state_path = None
+    run_started = None
+    if state_dir:
+        state_path = os.path.join(state_dir, f".last_maintenance_state_{sde_name.replace('.sde', '')}.json")
+        run_started = get_server_time(database_path)
+        last_state = load_last_state(state_path)
+        if last_state is not None:
+            unchanged = set()
+            # Must run before compress, which prunes SDE_mvtables_modified
+            success, versioned = process_with_error_handling(
+                f"finding unchanged datasets {sde_name}",
+                get_unchanged_versioned, database_path, last_state['state_id']
+            )
+            if success:
+                unchanged |= versioned
+            if last_state.get('server_time'):
+                success, unversioned = process_with_error_handling(
+                    f"finding unchanged unversioned datasets {sde_name}",
+                    get_unchanged_unversioned, database_path, last_state['server_time']
+                )
+                if success:
+                    unchanged |= unversioned
+            filtered = filter_unchanged(data_list, unchanged)
+            log_and_print(f"Skipping {len(data_list) - len(filtered)} unchanged dataset(s)")
+            data_list = filtered
+
+    states_before = get_state_snapshot(database_path) if skip_redundant_analyze else None
+
     operations = [
-        ("Analyzing", analyze),
-        ("Compressing", compress),
-        ("Rebuilding indexes", rebuild),
-        ("Analyzing", analyze),  # Second pass
+        ("Analyzing", analyze_parallel, (database_path, data_list, analyze_workers)),
+        ("Compressing", compress, (database_path,)),
+        ("Rebuilding indexes", rebuild, (database_path, data_list)),
     ]
 
-    for operation_name, operation_func in operations:
-        log_and_print(f"{operation_name}: {sde_name}")
-        success, error = process_with_error_handling(
-            f"{operation_name.lower()} {sde_name}",
-            operation_func,
-            database_path
-        )
-        if not success:
-            log_and_print(error, "error")
+    for operation_name, operation_func, args in operations:
+        if not run_operation(operation_name, operation_func, args, sde_name):
             return False
 
+    states_after = get_state_snapshot(database_path) if states_before or state_path else None
+
+    if states_before is not None and states_after == states_before:
+        log_and_print(f"Skipping second analyze for {sde_name} (no state change)")
+    elif not run_operation("Analyzing", analyze_parallel, (database_path, data_list, analyze_workers),
+                           sde_name):  # Second pass
+        return False
+
+    if state_path and states_after:
+        save_last_state(state_path, states_after[1], run_started)
+
     return True
 
 
@@ -66,6 +243,9 @@ def main():
     """Main entry point for database maintenance."""
     connection_dir = os.environ.get('SDE_CONNECTION_DIR')
     log_dir = os.environ.get('SDE_LOG_DIR')
+    skip_redundant = os.environ.get('SDE_SKIP_REDUNDANT_ANALYZE', 'false').lower() == 'true'
+    incremental = os.environ.get('SDE_INCREMENTAL_MAINTENANCE', 'false').lower() == 'true'
+    analyze_workers = int(os.environ.get('ANALYZE_PARALLEL', '1'))
 
     validate_paths(connection_dir=connection_dir, log_dir=log_dir)
     setup_logging(log_dir, "CompressRebuildAnalyze")
@@ -79,9 +259,13 @@ def main():
         log_and_print(f"No .sde files found in {connection_dir}", "warning")
         return
 
-    for sde_path in sde_files:
-        sde_name = os.path.basename(sde_path)
-        process_database(sde_path, sde_name)
+    max_workers = get_max_workers(len(sde_files))
+    log_and_print(f"Processing {len(sde_files)} database(s) with {max_workers} worker(s)")
+
+    state_dir = log_dir if incremental else None
+    tasks = [(sde_path, os.path.basename(sde_path), skip_redundant, state_dir, analyze_workers)
+             for sde_path in sde_files]
+    run_parallel(process_database, tasks, max_workers)
 
     log_and_print("DONE!")
 
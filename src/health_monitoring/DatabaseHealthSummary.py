@@ -4,7 +4,9 @@ Combines multiple health metrics including database size, index fragmentation,
 SDE repository status, and versioning health into a single report.
 """
 
+import json
 import os
+import re
 import sys
 import time
 
@@ -14,159 +16,230 @@ from dotenv import load_dotenv
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from sde_utils import (
     setup_logging, log_and_print, validate_paths,
-    get_sde_connections, execute_sql, format_bytes
+    get_sde_connections, execute_sql_batch, parameterize_sql, format_bytes
 )
 
 load_dotenv()
 
 
-def get_database_size(database_path):
-    """Get database file sizes and space usage.
+DATABASE_SIZE_SQL = """
+SELECT
+    DB_NAME() as database_name,
+    SUM(size * 8 * 1024) as total_bytes,
+    SUM(FILEPROPERTY(name, 'SpaceUsed') * 8 * 1024) as used_bytes
+FROM sys.database_files
+"""
+
+SDE_REPOSITORY_SQL = """
+SELECT
+    (SELECT COUNT(*) FROM sde.SDE_table_registry),
+    (SELECT COUNT(*) FROM sde.SDE_layers),
+    (SELECT COUNT(*) FROM sde.SDE_versions),
+    (SELECT COUNT(*) FROM sde.SDE_states)
+"""
+
+
+# The physical stats DMV is only invoked for indexes already known (from
+# partition metadata) to exceed 100 pages, rather than for every index
+INDEX_FRAGMENTATION_SQL = """
+WITH candidates AS (
+    SELECT ps.object_id, ps.index_id
+    FROM sys.dm_db_partition_stats ps
+    INNER JOIN sys.indexes i ON ps.object_id = i.object_id AND ps.index_id = i.index_id
+    WHERE i.name IS NOT NULL
+    GROUP BY ps.object_id, ps.index_id
+    HAVING SUM(ps.in_row_data_page_count) > 100
+)
+SELECT TOP (@top_n)
+    OBJECT_NAME(ips.object_id) as table_name,
+    i.name as index_name,
+    ips.avg_fragmentation_in_percent as fragmentation_pct,
+    ips.page_count
+FROM candidates c
+CROSS APPLY sys.dm_db_index_physical_stats(DB_ID(), c.object_id, c.index_id, NULL, 'LIMITED') ips
+INNER JOIN sys.indexes i ON ips.object_id = i.object_id AND ips.index_id = i.index_id
+WHERE ips.avg_fragmentation_in_percent > @threshold_percent
+  AND ips.page_count > 100
+ORDER BY fragmentation_pct DESC
+"""
+
+# Versioning adds/deletes tables are named a<id>/D<id>; match only those,
+# not every user table starting with 'a' or 'd'
+TABLE_ROW_COUNTS_SQL = """
+SELECT TOP (@top_n)
+    SCHEMA_NAME(t.schema_id) + '.' + t.name as table_name,
+    SUM(ps.row_count) as row_count
+FROM sys.tables t
+INNER JOIN sys.dm_db_partition_stats ps ON t.object_id = ps.object_id
+WHERE ps.index_id IN (0, 1)
+  AND t.is_ms_shipped = 0
+  AND t.name NOT LIKE 'sde[_]%'
+  AND t.name NOT LIKE 'a[0-9]%'
+  AND t.name NOT LIKE 'd[0-9]%'
+GROUP BY t.schema_id, t.name
+ORDER BY row_count DESC
+"""
+
+
+def index_fragmentation_sql(threshold_percent=10, top_n=20):
+    """Build the index fragmentation query.
 
     Args:
-        database_path: Path to .sde connection file
+        threshold_percent: Minimum fragmentation to report
+        top_n: Maximum number of indexes to return
 
     Returns:
-        Dict with size information
+        SQL string
+    """
+    return parameterize_sql(INDEX_FRAGMENTATION_SQL, top_n=int(top_n), threshold_percent=float(threshold_percent))
+
+
+def table_row_counts_sql(top_n=10):
+    """Build the largest-tables row count query.
+
+    Args:
+        top_n: Number of tables to return
+
+    Returns:
+        SQL string
     """
-    sql = """
-    SELECT
-        DB_NAME() as database_name,
-        SUM(size * 8 * 1024) as total_bytes,
-        SUM(FILEPROPERTY(name, 'SpaceUsed') * 8 * 1024) as used_bytes
-    FROM sys.database_files
+    return parameterize_sql(TABLE_ROW_COUNTS_SQL, top_n=int(top_n))
+
+
+def parse_database_size(result):
+    """Convert the database size query result to a dict.
+
+    Args:
+        result: Result of DATABASE_SIZE_SQL
+
+    Returns:
+        Dict with size information
     """
-    try:
-        result = execute_sql(database_path, sql)
-        if result and result is not True and len(result) > 0:
-            row = result[0]
-            total = row[1] or 0
-            used = row[2] or 0
-            return {
-                'total_bytes': total,
-                'used_bytes': used,
-                'free_bytes': total - used,
-                'used_percent': (used / total * 100) if total > 0 else 0
-            }
-    except Exception as e:
-        log_and_print(f"Error getting database size: {e}", "error")
+    if result and result is not True and len(result) > 0:
+        row = result[0]
+        total = int(row[1] or 0)
+        used = int(row[2] or 0)
+        return {
+            'total_bytes': total,
+            'used_bytes': used,
+            'free_bytes': total - used,
+            'used_percent': (used / total * 100) if total > 0 else 0
+        }
 
     return {'total_bytes': 0, 'used_bytes': 0, 'free_bytes': 0, 'used_percent': 0}
 
 
-def get_index_fragmentation(database_path, threshold_percent=10):
-    """Get index fragmentation above threshold.
+def parse_index_fragmentation(result):
+    """Convert the fragmentation query result to a list of dicts.
 
     Args:
-        database_path: Path to .sde connection file
-        threshold_percent: Minimum fragmentation to report
+        result: Result of index_fragmentation_sql()
 
     Returns:
         List of fragmented indexes
     """
-    sql = f"""
-    SELECT TOP 20
-        OBJECT_NAME(ips.object_id) as table_name,
-        i.name as index_name,
-        ips.avg_fragmentation_in_percent as fragmentation_pct,
-        ips.page_count
-    FROM sys.dm_db_index_physical_stats(DB_ID(), NULL, NULL, NULL, 'LIMITED') ips
-    INNER JOIN sys.indexes i ON ips.object_id = i.object_id AND ips.index_id = i.index_id
-    WHERE ips.avg_fragmentation_in_percent > {threshold_percent}
-      AND ips.page_count > 100
-      AND i.name IS NOT NULL
-    ORDER BY fragmentation_pct DESC
-    """
-    try:
-        result = execute_sql(database_path, sql)
-        if not result or result is True:
-            return []
-
-        indexes = []
-        for row in result:
-            indexes.append({
-                'table': row[0],
-                'index': row[1],
-                'fragmentation': round(row[2], 1),
-                'pages': row[3]
-            })
-        return indexes
-    except Exception as e:
-        log_and_print(f"Error getting fragmentation: {e}", "error")
+    if not result or result is True:
         return []
 
+    indexes = []
+    for row in result:
+        indexes.append({
+            'table': row[0],
+            'index': row[1],
+            'fragmentation': round(float(row[2]), 1),
+            'pages': int(row[3])
+        })
+    return indexes
 
-def get_sde_repository_health(database_path):
-    """Check SDE system tables for basic health.
+
+def parse_sde_repository_health(result):
+    """Convert the SDE repository count row to a dict.
 
     Args:
-        database_path: Path to .sde connection file
+        result: Result of SDE_REPOSITORY_SQL
 
     Returns:
         Dict with repository statistics
     """
-    stats = {
-        'registrations': 0,
-        'layers': 0,
-        'versions': 0,
-        'states': 0
-    }
-
-    queries = [
-        ("SELECT COUNT(*) FROM sde.SDE_table_registry", 'registrations'),
-        ("SELECT COUNT(*) FROM sde.SDE_layers", 'layers'),
-        ("SELECT COUNT(*) FROM sde.SDE_versions", 'versions'),
-        ("SELECT COUNT(*) FROM sde.SDE_states", 'states')
-    ]
-
-    for sql, key in queries:
-        try:
-            result = execute_sql(database_path, sql)
-            if result and result is not True:
-                stats[key] = result[0][0] if isinstance(result[0], (list, tuple)) else result[0]
-        except Exception:
-            pass
-
+    keys = ('registrations', 'layers', 'versions', 'states')
+    stats = dict.fromkeys(keys, 0)
+    if result and result is not True:
+        for key, value in zip(keys, result[0]):
+            stats[key] = int(value or 0)
     return stats
 
 
-def get_table_row_counts(database_path, top_n=10):
-    """Get row counts for largest tables.
+def parse_table_row_counts(result):
+    """Convert the row count query result to a list of dicts.
 
     Args:
-        database_path: Path to .sde connection file
-        top_n: Number of tables to return
+        result: Result of table_row_counts_sql()
 
     Returns:
         List of table row counts
     """
-    sql = f"""
-    SELECT TOP {top_n}
-        SCHEMA_NAME(t.schema_id) + '.' + t.name as table_name,
-        p.rows as row_count
-    FROM sys.tables t
-    INNER JOIN sys.partitions p ON t.object_id = p.object_id
-    WHERE p.index_id IN (0, 1)
-      AND t.name NOT LIKE 'sde_%'
-      AND t.name NOT LIKE 'a%'
-      AND t.name NOT LIKE 'd%'
-    ORDER BY p.rows DESC
-    """
-    try:
-        result = execute_sql(database_path, sql)
-        if not result or result is True:
-            return []
-
-        tables = []
-        for row in result:
-            tables.append({
-                'table': row[0],
-                'rows': row[1]
-            })
-        return tables
-    except Exception:
+    if not result or result is True:
         return []
 
+    tables = []
+    for row in result:
+        tables.append({
+            'table': row[0],
+            'rows': int(row[1] or 0)
+        })
+    return tables
+
+
+def snapshot_proc_sql(proc_name, metric, **params):
+    """Build an EXEC of the sp_health_snapshot procedure (sql/sp_health_snapshot.sql).
+
+    Args:
+        proc_name: Schema-qualified procedure name
+        metric: 'size', 'fragmentation', 'repository' or 'row_counts'
+        **params: Integer/float procedure parameters
+
+    Returns:
+        SQL string
+    """
+    args = "".join(f", @{name} = {value!r}" for name, value in params.items())
+    return f"EXEC {proc_name} @metric = N'{metric}'{args}"
+
+
+def get_health_metrics(database_path, snapshot_proc=None):
+    """Gather all health metrics over a single SQL connection.
+
+    Args:
+        database_path: Path to .sde connection file
+        snapshot_proc: Installed sp_health_snapshot procedure to call instead
+            of sending the query text (falls back to the text on failure)
+
+    Returns:
+        Tuple of (db_size, fragmentation, sde_health, top_tables)
+    """
+    statements = [DATABASE_SIZE_SQL, index_fragmentation_sql(), SDE_REPOSITORY_SQL, table_row_counts_sql()]
+
+    if snapshot_proc:
+        results = execute_sql_batch(database_path, [
+            snapshot_proc_sql(snapshot_proc, 'size'),
+            snapshot_proc_sql(snapshot_proc, 'fragmentation', top_n=20, threshold_percent=10.0),
+            snapshot_proc_sql(snapshot_proc, 'repository'),
+            snapshot_proc_sql(snapshot_proc, 'row_counts', top_n=10),
+        ])
+        failed = [i for i, result in enumerate(results) if result is None]
+        if failed:
+            log_and_print(f"{snapshot_proc} unavailable, using inline SQL", "warning")
+            for i, result in zip(failed, execute_sql_batch(database_path, [statements[i] for i in failed])):
+                results[i] = result
+    else:
+        results = execute_sql_batch(database_path, statements)
+
+    return (
+        parse_database_size(results[0]),
+        parse_index_fragmentation(results[1]),
+        parse_sde_repository_health(results[2]),
+        parse_table_row_counts(results[3]),
+    )
+
 
 def calculate_health_score(db_size, fragmentation, sde_health, frag_threshold):
     """Calculate overall health score 0-100.
@@ -215,8 +288,8 @@ def calculate_health_score(db_size, fragmentation, sde_health, frag_threshold):
     return score, status, issues
 
 
-def format_report(database_name, db_size, fragmentation, sde_health, top_tables, score, status, issues):
-    """Format comprehensive health report.
+def iter_report_lines(database_name, db_size, fragmentation, sde_health, top_tables, score, status, issues):
+    """Yield the lines of the health report, without trailing newlines.
 
     Args:
         database_name: Name of database
@@ -228,72 +301,90 @@ def format_report(database_name, db_size, fragmentation, sde_health, top_tables,
         status: Health status
         issues: List of issues
 
-    Returns:
-        Formatted report string
+    Yields:
+        Report lines
     """
-    lines = [
-        f"Database Health Summary: {database_name}",
-        "=" * 70,
-        f"Health Score: {score}/100 ({status})",
-        ""
-    ]
+    yield f"Database Health Summary: {database_name}"
+    yield "=" * 70
+    yield f"Health Score: {score}/100 ({status})"
+    yield ""
 
     if issues:
-        lines.append("Issues:")
+        yield "Issues:"
         for issue in issues:
-            lines.append(f"  - {issue}")
-        lines.append("")
-
-    lines.extend([
-        "Database Size:",
-        f"  Total:     {format_bytes(db_size['total_bytes'])}",
-        f"  Used:      {format_bytes(db_size['used_bytes'])} ({db_size['used_percent']:.1f}%)",
-        f"  Free:      {format_bytes(db_size['free_bytes'])}",
-        ""
-    ])
-
-    lines.extend([
-        "SDE Repository:",
-        f"  Registered Tables:  {sde_health['registrations']:,}",
-        f"  Layers:             {sde_health['layers']:,}",
-        f"  Versions:           {sde_health['versions']:,}",
-        f"  States:             {sde_health['states']:,}",
-        ""
-    ])
+            yield f"  - {issue}"
+        yield ""
+
+    yield "Database Size:"
+    yield f"  Total:     {format_bytes(db_size['total_bytes'])}"
+    yield f"  Used:      {format_bytes(db_size['used_bytes'])} ({db_size['used_percent']:.1f}%)"
+    yield f"  Free:      {format_bytes(db_size['free_bytes'])}"
+    yield ""
+
+    yield "SDE Repository:"
+    yield f"  Registered Tables:  {sde_health['registrations']:,}"
+    yield f"  Layers:             {sde_health['layers']:,}"
+    yield f"  Versions:           {sde_health['versions']:,}"
+    yield f"  States:             {sde_health['states']:,}"
+    yield ""
 
     if fragmentation:
-        lines.append(f"Fragmented Indexes (top {len(fragmentation)}):")
-        lines.append(f"  {'Table':<30} {'Index':<25} {'Frag %':<8}")
-        lines.append("  " + "-" * 63)
+        yield f"Fragmented Indexes (top {len(fragmentation)}):"
+        yield f"  {'Table':<30} {'Index':<25} {'Frag %':<8}"
+        yield "  " + "-" * 63
         for idx in fragmentation[:10]:
-            lines.append(f"  {idx['table'][:30]:<30} {idx['index'][:25]:<25} {idx['fragmentation']:<8}")
-        lines.append("")
+            yield f"  {idx['table'][:30]:<30} {idx['index'][:25]:<25} {idx['fragmentation']:<8}"
+        yield ""
 
     if top_tables:
-        lines.append("Largest Tables:")
+        yield "Largest Tables:"
         for t in top_tables[:5]:
-            lines.append(f"  {t['table']:<40} {t['rows']:>12,} rows")
+            yield f"  {t['table']:<40} {t['rows']:>12,} rows"
+
 
-    return "\n".join(lines)
+def report_lines(report_data):
+    """Yield newline-terminated report lines for a report_data dict.
 
+    Args:
+        report_data: Dict built by process_database
 
-def export_report(report_data, output_dir, database_name):
-    """Export report to file.
+    Yields:
+        Report lines ending in newline
+    """
+    for line in iter_report_lines(
+        report_data['database'], report_data['size'], report_data['fragmentation'],
+        report_data['sde_repository'], report_data['top_tables'],
+        report_data['score'], report_data['status'], report_data['issues']
+    ):
+        yield line + "\n"
+
+
+def export_report(report_data, output_dir, database_name, report_format="txt"):
+    """Export report to file, streaming lines rather than building one string.
 
     Args:
         report_data: Dict with all report data
         output_dir: Output directory
         database_name: Database name
+        report_format: 'txt' or 'json'
     """
     timestr = time.strftime("%Y-%m-%d_%H%M%S")
-    path = os.path.join(output_dir, f"{timestr}_{database_name}_health.txt")
-    with open(path, 'w') as f:
-        f.write(report_data.get('formatted_report', ''))
+    if report_format == "json":
+        # report_data holds only str/int/float/list/dict, so no default= hook is needed
+        path = os.path.join(output_dir, f"{timestr}_{database_name}_health.json")
+        payload = json.dumps(report_data, separators=(',', ':'))
+        with open(path, 'wb') as f:
+            f.write(payload.encode('utf-8'))
+    else:
+        path = os.path.join(output_dir, f"{timestr}_{database_name}_health.txt")
+        with open(path, 'w', buffering=1 << 16) as f:
+            f.writelines(report_lines(report_data))
 
     log_and_print(f"Report exported: {path}")
 
 
-def process_database(database_path, sde_name, frag_threshold, output_dir):
+def process_database(database_path, sde_name, frag_threshold, output_dir, report_format="txt",
+                     snapshot_proc=None):
     """Generate health summary for a database.
 
     Args:
@@ -301,22 +392,18 @@ def process_database(database_path, sde_name, frag_threshold, output_dir):
         sde_name: Name of database for logging
         frag_threshold: Fragmentation warning threshold
         output_dir: Output directory for reports
+        report_format: Exported report format ('txt' or 'json')
+        snapshot_proc: Installed sp_health_snapshot procedure name (optional)
 
     Returns:
         Dict with health summary
     """
     log_and_print(f"Generating health summary for: {sde_name}")
 
-    db_size = get_database_size(database_path)
-    fragmentation = get_index_fragmentation(database_path)
-    sde_health = get_sde_repository_health(database_path)
-    top_tables = get_table_row_counts(database_path)
+    db_size, fragmentation, sde_health, top_tables = get_health_metrics(database_path, snapshot_proc)
 
     score, status, issues = calculate_health_score(db_size, fragmentation, sde_health, frag_threshold)
 
-    report = format_report(sde_name, db_size, fragmentation, sde_health, top_tables, score, status, issues)
-    print(report)
-
     report_data = {
         'database': sde_name,
         'timestamp': time.strftime("%Y-%m-%d %H:%M:%S"),
@@ -326,12 +413,12 @@ def process_database(database_path, sde_name, frag_threshold, output_dir):
         'size': db_size,
         'sde_repository': sde_health,
         'fragmentation': fragmentation,
-        'top_tables': top_tables,
-        'formatted_report': report
+        'top_tables': top_tables
     }
+    sys.stdout.writelines(report_lines(report_data))
 
     if output_dir:
-        export_report(report_data, output_dir, sde_name.replace('.sde', ''))
+        export_report(report_data, output_dir, sde_name.replace('.sde', ''), report_format)
 
     return {
         'database': sde_name,
@@ -346,8 +433,12 @@ def main():
     connection_dir = os.environ.get('SDE_CONNECTION_DIR')
     log_dir = os.environ.get('SDE_LOG_DIR')
     frag_threshold = int(os.environ.get('FRAGMENTATION_WARNING_THRESHOLD', '30'))
+    report_format = os.environ.get('HEALTH_REPORT_FORMAT', 'txt').lower()
+    snapshot_proc = os.environ.get('HEALTH_SNAPSHOT_PROC', '')
 
     validate_paths(connection_dir=connection_dir, log_dir=log_dir)
+    if snapshot_proc and not re.fullmatch(r'\w+(\.\w+)?', snapshot_proc):
+        raise ValueError(f"Invalid HEALTH_SNAPSHOT_PROC name: {snapshot_proc}")
     setup_logging(log_dir, "DatabaseHealthSummary")
 
     workspace = arcpy.GetParameterAsText(0)
@@ -362,7 +453,7 @@ def main():
     results = []
     for sde_path in sde_files:
         sde_name = os.path.basename(sde_path)
-        result = process_database(sde_path, sde_name, frag_threshold, log_dir)
+        result = process_database(sde_path, sde_name, frag_threshold, log_dir, report_format, snapshot_proc)
         results.append(result)
 
     log_and_print("\n" + "=" * 50)
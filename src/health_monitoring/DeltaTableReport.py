@@ -14,137 +14,106 @@ from dotenv import load_dotenv
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from sde_utils import (
     setup_logging, log_and_print, validate_paths,
-    get_sde_connections, execute_sql, format_bytes
+    get_sde_connections, execute_sql, get_max_workers, run_parallel,
+    parameterize_sql, format_bytes
 )
 
 load_dotenv()
 
-
-def get_versioned_tables(database_path):
-    """Get list of tables registered as versioned.
-
-    Args:
-        database_path: Path to .sde connection file
-
-    Returns:
-        List of versioned table names
-    """
-    sql = """
+# Per versioned table adds/deletes totals, trimmed server-side to the
+# top_n largest plus every table at or above min_bytes
+DELTA_REPORT_SQL = """
+WITH registered AS (
     SELECT owner, table_name, registration_id
     FROM sde.SDE_table_registry
     WHERE object_flags & 8 = 8
-    ORDER BY owner, table_name
-    """
-    try:
-        result = execute_sql(database_path, sql)
-        if not result or result is True:
-            return []
+),
+delta AS (
+    SELECT
+        r.registration_id,
+        k.kind,
+        SUM(CASE WHEN ps.index_id IN (0, 1) THEN ps.row_count ELSE 0 END) as row_count,
+        SUM(ps.reserved_page_count) * 8 * 1024 as size_bytes
+    FROM registered r
+    CROSS JOIN (VALUES ('a'), ('d')) k(kind)
+    INNER JOIN sys.tables t
+        ON t.name = k.kind + CAST(r.registration_id AS VARCHAR(10))
+       AND t.schema_id = SCHEMA_ID(r.owner)
+    INNER JOIN sys.dm_db_partition_stats ps ON t.object_id = ps.object_id
+    GROUP BY r.registration_id, k.kind
+),
+totals AS (
+    SELECT
+        r.owner + '.' + r.table_name as table_name,
+        r.registration_id,
+        SUM(CASE WHEN d.kind = 'a' THEN d.row_count ELSE 0 END) as adds_rows,
+        SUM(CASE WHEN d.kind = 'a' THEN d.size_bytes ELSE 0 END) as adds_bytes,
+        SUM(CASE WHEN d.kind = 'd' THEN d.row_count ELSE 0 END) as deletes_rows,
+        SUM(CASE WHEN d.kind = 'd' THEN d.size_bytes ELSE 0 END) as deletes_bytes
+    FROM registered r
+    LEFT JOIN delta d ON d.registration_id = r.registration_id
+    GROUP BY r.owner, r.table_name, r.registration_id
+),
+ranked AS (
+    SELECT *,
+        ROW_NUMBER() OVER (ORDER BY adds_bytes + deletes_bytes DESC) as size_rank,
+        COUNT(*) OVER () as versioned_count
+    FROM totals
+)
+SELECT table_name, registration_id, adds_rows, adds_bytes,
+       deletes_rows, deletes_bytes, versioned_count
+FROM ranked
+WHERE size_rank <= @top_n OR adds_bytes + deletes_bytes >= @min_bytes
+ORDER BY size_rank
+"""
 
-        tables = []
-        for row in result:
-            tables.append({
-                'owner': row[0],
-                'name': row[1],
-                'registration_id': row[2]
-            })
-        return tables
-    except Exception as e:
-        log_and_print(f"Error getting versioned tables: {e}", "error")
-        return []
+# Bound format of a "Top 10 by Delta Size" row: table, adds, deletes, total
+TOP_ROW_FORMAT = "{:<40} {:<12} {:<12} {:<12}".format
 
 
-def get_delta_table_sizes(database_path):
-    """Get sizes of all delta (A and D) tables.
+def get_delta_report(database_path, min_bytes, top_n=10):
+    """Get delta sizes for the largest and over-threshold versioned tables.
 
     Args:
         database_path: Path to .sde connection file
+        min_bytes: Include every table whose delta size reaches this
+        top_n: Also include this many of the largest tables
 
     Returns:
-        Dict mapping base table to delta sizes
-    """
-    sql = """
-    SELECT
-        t.name as table_name,
-        p.rows as row_count,
-        SUM(a.total_pages) * 8 * 1024 as size_bytes
-    FROM sys.tables t
-    INNER JOIN sys.indexes i ON t.object_id = i.object_id
-    INNER JOIN sys.partitions p ON i.object_id = p.object_id AND i.index_id = p.index_id
-    INNER JOIN sys.allocation_units a ON p.partition_id = a.container_id
-    WHERE (t.name LIKE 'a%' OR t.name LIKE 'd%')
-      AND t.name NOT LIKE 'arc%'
-      AND LEN(t.name) <= 10
-      AND ISNUMERIC(SUBSTRING(t.name, 2, LEN(t.name)-1)) = 1
-    GROUP BY t.name, p.rows
-    ORDER BY size_bytes DESC
+        Tuple of (versioned table count, list of table delta info sorted
+        by total size, largest first)
     """
+    sql = parameterize_sql(DELTA_REPORT_SQL, top_n=int(top_n), min_bytes=float(min_bytes))
     try:
-        result = execute_sql(database_path, sql)
+        result = execute_sql(database_path, sql, cache=True)
         if not result or result is True:
-            return {}
+            return 0, []
 
-        sizes = {}
+        tables = []
         for row in result:
-            table_name = row[0]
-            row_count = row[1] or 0
-            size_bytes = row[2] or 0
-
-            reg_id = table_name[1:]
-            table_type = 'adds' if table_name.lower().startswith('a') else 'deletes'
-
-            if reg_id not in sizes:
-                sizes[reg_id] = {'adds_rows': 0, 'adds_bytes': 0, 'deletes_rows': 0, 'deletes_bytes': 0}
-
-            if table_type == 'adds':
-                sizes[reg_id]['adds_rows'] = row_count
-                sizes[reg_id]['adds_bytes'] = size_bytes
-            else:
-                sizes[reg_id]['deletes_rows'] = row_count
-                sizes[reg_id]['deletes_bytes'] = size_bytes
-
-        return sizes
+            adds_rows, adds_bytes, deletes_rows, deletes_bytes = (v or 0 for v in row[2:6])
+            tables.append({
+                'table': row[0],
+                'registration_id': row[1],
+                'adds_rows': adds_rows,
+                'adds_size': adds_bytes,
+                'deletes_rows': deletes_rows,
+                'deletes_size': deletes_bytes,
+                'total_rows': adds_rows + deletes_rows,
+                'total_size': adds_bytes + deletes_bytes
+            })
+        return result[0][6], tables
     except Exception as e:
         log_and_print(f"Error getting delta sizes: {e}", "error")
-        return {}
-
-
-def map_tables_to_deltas(versioned_tables, delta_sizes):
-    """Map versioned tables to their delta table sizes.
-
-    Args:
-        versioned_tables: List of versioned table info
-        delta_sizes: Dict of delta table sizes by registration_id
-
-    Returns:
-        List of tables with delta info
-    """
-    results = []
-    for table in versioned_tables:
-        reg_id = str(table['registration_id'])
-        delta = delta_sizes.get(reg_id, {})
-
-        total_bytes = delta.get('adds_bytes', 0) + delta.get('deletes_bytes', 0)
-        total_rows = delta.get('adds_rows', 0) + delta.get('deletes_rows', 0)
-
-        results.append({
-            'table': f"{table['owner']}.{table['name']}",
-            'registration_id': table['registration_id'],
-            'adds_rows': delta.get('adds_rows', 0),
-            'adds_size': delta.get('adds_bytes', 0),
-            'deletes_rows': delta.get('deletes_rows', 0),
-            'deletes_size': delta.get('deletes_bytes', 0),
-            'total_rows': total_rows,
-            'total_size': total_bytes
-        })
-
-    return sorted(results, key=lambda x: x['total_size'], reverse=True)
+        return 0, []
 
 
 def identify_bloated(report_data, warning_mb, critical_mb):
     """Identify tables with excessive delta sizes.
 
     Args:
-        report_data: List of table delta info
+        report_data: List of table delta info, including every table at
+            or above the warning threshold
         warning_mb: Warning threshold in MB
         critical_mb: Critical threshold in MB
 
@@ -160,56 +129,73 @@ def identify_bloated(report_data, warning_mb, critical_mb):
     return critical, warning
 
 
-def format_report(database_name, report_data, critical, warning):
-    """Format delta table report.
+def iter_report_lines(database_name, report_data, critical, warning, versioned_count=None):
+    """Yield the lines of the delta table report, without trailing newlines.
 
     Args:
         database_name: Name of database
-        report_data: All table delta info
+        report_data: Table delta info, largest first
         critical: Critical tables
         warning: Warning tables
+        versioned_count: Number of versioned tables (default: len(report_data))
 
-    Returns:
-        Formatted report string
+    Yields:
+        Report lines
     """
-    lines = [
-        f"Delta Table Report: {database_name}",
-        "=" * 80,
-        f"Versioned Tables: {len(report_data)}",
-        f"Critical (action needed): {len(critical)}",
-        f"Warning: {len(warning)}",
-        ""
-    ]
+    if versioned_count is None:
+        versioned_count = len(report_data)
+
+    yield f"Delta Table Report: {database_name}"
+    yield "=" * 80
+    yield f"Versioned Tables: {versioned_count}"
+    yield f"Critical (action needed): {len(critical)}"
+    yield f"Warning: {len(warning)}"
+    yield ""
 
     if critical:
-        lines.append("CRITICAL - Compress these immediately:")
-        lines.append("-" * 60)
+        yield "CRITICAL - Compress these immediately:"
+        yield "-" * 60
         for t in critical:
-            lines.append(f"  {t['table']}")
-            lines.append(f"    Delta size: {format_bytes(t['total_size'])} ({t['total_rows']:,} rows)")
-        lines.append("")
+            yield f"  {t['table']}"
+            yield f"    Delta size: {format_bytes(t['total_size'])} ({t['total_rows']:,} rows)"
+        yield ""
 
     if warning:
-        lines.append("WARNING - Monitor these tables:")
-        lines.append("-" * 60)
+        yield "WARNING - Monitor these tables:"
+        yield "-" * 60
         for t in warning:
-            lines.append(f"  {t['table']}")
-            lines.append(f"    Delta size: {format_bytes(t['total_size'])} ({t['total_rows']:,} rows)")
-        lines.append("")
-
-    lines.append("Top 10 by Delta Size:")
-    lines.append("-" * 60)
-    lines.append(f"{'Table':<40} {'Adds':<12} {'Deletes':<12} {'Total':<12}")
-    lines.append("-" * 60)
-    for t in report_data[:10]:
-        lines.append(
-            f"{t['table'][:40]:<40} "
-            f"{format_bytes(t['adds_size']):<12} "
-            f"{format_bytes(t['deletes_size']):<12} "
-            f"{format_bytes(t['total_size']):<12}"
+            yield f"  {t['table']}"
+            yield f"    Delta size: {format_bytes(t['total_size'])} ({t['total_rows']:,} rows)"
+        yield ""
+
+    yield "Top 10 by Delta Size:"
+    yield "-" * 60
+    yield TOP_ROW_FORMAT("Table", "Adds", "Deletes", "Total")
+    yield "-" * 60
+    yield from (
+        TOP_ROW_FORMAT(
+            t['table'][:40], format_bytes(t['adds_size']),
+            format_bytes(t['deletes_size']), format_bytes(t['total_size'])
         )
+        for t in report_data[:10]
+    )
+
+
+def report_lines(database_name, report_data, critical, warning, versioned_count=None):
+    """Yield newline-terminated report lines.
+
+    Args:
+        database_name: Name of database
+        report_data: Table delta info, largest first
+        critical: Critical tables
+        warning: Warning tables
+        versioned_count: Number of versioned tables (default: len(report_data))
 
-    return "\n".join(lines)
+    Yields:
+        Report lines ending in newline
+    """
+    for line in iter_report_lines(database_name, report_data, critical, warning, versioned_count):
+        yield line + "\n"
 
 
 def process_database(database_path, sde_name, warning_mb, critical_mb, output_dir):
@@ -227,29 +213,25 @@ def process_database(database_path, sde_name, warning_mb, critical_mb, output_di
     """
     log_and_print(f"Analyzing delta tables for: {sde_name}")
 
-    versioned_tables = get_versioned_tables(database_path)
-    if not versioned_tables:
+    versioned_count, report_data = get_delta_report(database_path, warning_mb * 1024 * 1024)
+    if not versioned_count:
         log_and_print(f"No versioned tables found in {sde_name}")
         return {'database': sde_name, 'tables': 0, 'critical': 0, 'warning': 0}
 
-    delta_sizes = get_delta_table_sizes(database_path)
-    report_data = map_tables_to_deltas(versioned_tables, delta_sizes)
-
     critical, warning = identify_bloated(report_data, warning_mb, critical_mb)
 
-    report = format_report(sde_name, report_data, critical, warning)
-    print(report)
+    sys.stdout.writelines(report_lines(sde_name, report_data, critical, warning, versioned_count))
 
     if output_dir:
         timestr = time.strftime("%Y-%m-%d_%H%M%S")
         txt_path = os.path.join(output_dir, f"{timestr}_{sde_name.replace('.sde', '')}_delta_report.txt")
-        with open(txt_path, 'w') as f:
-            f.write(report)
+        with open(txt_path, 'w', buffering=1 << 20, encoding='utf-8') as f:
+            f.writelines(report_lines(sde_name, report_data, critical, warning, versioned_count))
         log_and_print(f"Report saved: {txt_path}")
 
     return {
         'database': sde_name,
-        'tables': len(versioned_tables),
+        'tables': versioned_count,
         'critical': len(critical),
         'warning': len(warning)
     }
@@ -276,11 +258,12 @@ def main():
         log_and_print(f"No .sde files found in {connection_dir}", "warning")
         return
 
-    results = []
-    for sde_path in sde_files:
-        sde_name = os.path.basename(sde_path)
-        result = process_database(sde_path, sde_name, warning_mb, critical_mb, log_dir)
-        results.append(result)
+    max_workers = get_max_workers(len(sde_files))
+    log_and_print(f"Processing {len(sde_files)} database(s) with {max_workers} worker(s)")
+
+    tasks = [(sde_path, os.path.basename(sde_path), warning_mb, critical_mb, log_dir)
+             for sde_path in sde_files]
+    results = [r for r in run_parallel(process_database, tasks, max_workers) if r]
 
     total_critical = sum(r['critical'] for r in results)
     total_warning = sum(r['warning'] for r in results)
@@ -13,96 +13,65 @@ from dotenv import load_dotenv
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from sde_utils import (
     setup_logging, log_and_print, validate_paths,
-    get_sde_connections, execute_sql
+    get_sde_connections, execute_sql, get_max_workers, run_parallel
 )
 
 load_dotenv()
 
 
-def get_table_count(database_path, table_name, error_label):
-    """Get count of records in an SDE table.
-
-    Args:
-        database_path: Path to .sde connection file
-        table_name: Name of the table to count
-        error_label: Label for error messages
-
-    Returns:
-        Count of records, or -1 on error
-    """
-    sql = f"SELECT COUNT(*) FROM sde.{table_name}"
-    try:
-        result = execute_sql(database_path, sql)
-        if result and result is not True:
-            return result[0][0] if isinstance(result[0], (list, tuple)) else result[0]
-        return 0
-    except Exception as e:
-        log_and_print(f"Error getting {error_label}: {e}", "error")
-        return -1
-
-
-def get_state_count(database_path):
-    """Get count of states in SDE_states table."""
-    return get_table_count(database_path, "SDE_states", "state count")
-
-
-def get_lineage_count(database_path):
-    """Get count of lineage records."""
-    return get_table_count(database_path, "SDE_state_lineages", "lineage count")
-
-
-def get_state_range(database_path):
-    """Get min/max state IDs for tree depth analysis.
+# The orphan count is an anti-join over every state; HASH JOIN keeps it
+# O(states + versions) even where SDE_versions.state_id is not indexed
+STATE_METRICS_SQL = """
+SELECT
+    (SELECT COUNT(*) FROM sde.SDE_states),
+    (SELECT COUNT(*) FROM sde.SDE_state_lineages),
+    (SELECT MIN(state_id) FROM sde.SDE_states),
+    (SELECT MAX(state_id) FROM sde.SDE_states),
+    (SELECT COUNT(*)
+     FROM sde.SDE_states s
+     LEFT JOIN sde.SDE_versions v ON v.state_id = s.state_id
+     WHERE v.state_id IS NULL)
+OPTION (HASH JOIN)
+"""
 
-    Args:
-        database_path: Path to .sde connection file
 
-    Returns:
-        Dict with min_state, max_state, and range
-    """
-    sql = """
-    SELECT MIN(state_id) as min_state,
-           MAX(state_id) as max_state,
-           MAX(state_id) - MIN(state_id) as state_range
-    FROM sde.SDE_states
-    """
-    try:
-        result = execute_sql(database_path, sql)
-        if result and result is not True and len(result) > 0:
-            row = result[0]
-            return {
-                'min_state': row[0],
-                'max_state': row[1],
-                'range': row[2]
-            }
-        return {'min_state': 0, 'max_state': 0, 'range': 0}
-    except Exception:
-        return {'min_state': -1, 'max_state': -1, 'range': -1}
-
-
-def get_orphan_count(database_path):
-    """Count orphaned states not linked to any version.
+def get_state_metrics(database_path):
+    """Get state, lineage and orphan counts plus the state ID range in one query.
 
     Args:
         database_path: Path to .sde connection file
 
     Returns:
-        Count of orphaned states
-    """
-    sql = """
-    SELECT COUNT(*)
-    FROM sde.SDE_states s
-    WHERE NOT EXISTS (
-        SELECT 1 FROM sde.SDE_versions v WHERE v.state_id = s.state_id
-    )
+        Dict with state_count, lineage_count, state_range and orphan_count
+        (-1 values on error)
     """
     try:
-        result = execute_sql(database_path, sql)
-        if result and result is not True:
-            return result[0][0] if isinstance(result[0], (list, tuple)) else result[0]
-        return 0
-    except Exception:
-        return -1
+        result = execute_sql(database_path, STATE_METRICS_SQL, cache=True)
+    except Exception as e:
+        log_and_print(f"Error getting state metrics: {e}", "error")
+        return {
+            'state_count': -1,
+            'lineage_count': -1,
+            'state_range': {'min_state': -1, 'max_state': -1, 'range': -1},
+            'orphan_count': -1
+        }
+
+    if not result or result is True:
+        return {
+            'state_count': 0,
+            'lineage_count': 0,
+            'state_range': {'min_state': 0, 'max_state': 0, 'range': 0},
+            'orphan_count': 0
+        }
+
+    state_count, lineage_count, min_state, max_state, orphan_count = result[0]
+    state_range = max_state - min_state if min_state is not None and max_state is not None else None
+    return {
+        'state_count': state_count,
+        'lineage_count': lineage_count,
+        'state_range': {'min_state': min_state, 'max_state': max_state, 'range': state_range},
+        'orphan_count': orphan_count
+    }
 
 
 def analyze_health(database_path, warning_threshold, critical_threshold):
@@ -116,10 +85,8 @@ def analyze_health(database_path, warning_threshold, critical_threshold):
     Returns:
         Dict with health analysis results
     """
-    state_count = get_state_count(database_path)
-    lineage_count = get_lineage_count(database_path)
-    state_range = get_state_range(database_path)
-    orphan_count = get_orphan_count(database_path)
+    metrics = get_state_metrics(database_path)
+    state_count = metrics['state_count']
 
     if state_count >= critical_threshold:
         status = "CRITICAL"
@@ -132,10 +99,7 @@ def analyze_health(database_path, warning_threshold, critical_threshold):
         recommendation = "State table is healthy. Regular maintenance recommended."
 
     return {
-        'state_count': state_count,
-        'lineage_count': lineage_count,
-        'state_range': state_range,
-        'orphan_count': orphan_count,
+        **metrics,
         'status': status,
         'recommendation': recommendation
     }
@@ -219,11 +183,12 @@ def main():
         log_and_print(f"No .sde files found in {connection_dir}", "warning")
         return
 
-    results = []
-    for sde_path in sde_files:
-        sde_name = os.path.basename(sde_path)
-        result = process_database(sde_path, sde_name, warning_threshold, critical_threshold)
-        results.append(result)
+    max_workers = get_max_workers(len(sde_files))
+    log_and_print(f"Processing {len(sde_files)} database(s) with {max_workers} worker(s)")
+
+    tasks = [(sde_path, os.path.basename(sde_path), warning_threshold, critical_threshold)
+             for sde_path in sde_files]
+    results = [r for r in run_parallel(process_database, tasks, max_workers) if r]
 
     critical_count = sum(1 for r in results if r['status'] == 'CRITICAL')
     warning_count = sum(1 for r in results if r['status'] == 'WARNING')
@@ -3,35 +3,69 @@
 Common functions for logging, path validation, SQL execution, and API authentication.
 """
 
+import atexit
+import functools
 import logging
+import math
+import multiprocessing
 import os
 import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from logging.handlers import MemoryHandler, QueueHandler, QueueListener
 
-import arcpy
 import requests
 from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 load_dotenv()
 
+_sql_connections = {}
 
-def setup_logging(log_dir, script_name):
+_version_lists = {}
+
+_http_session = None
+
+_BYTE_UNITS = ('B', 'KB', 'MB', 'GB', 'TB', 'PB')
+
+# ASCII characters safe_filename replaces: all but letters, digits and ._-
+_UNSAFE_FILENAME_CHARS = str.maketrans({
+    chr(c): '_' for c in range(128) if not (chr(c).isalnum() or chr(c) in '._-')
+})
+
+
+def setup_logging(log_dir, script_name, buffered=False):
     """Configure logging with timestamped filename for specific script.
 
+    Records are written as they are logged by default, so the file can be
+    tailed and nothing is lost if the process is killed. With buffered,
+    records are written in batches of 512; an ERROR record, or interpreter
+    exit (logging.shutdown), flushes the buffer immediately.
+
     Args:
         log_dir: Directory for log files
         script_name: Name of the script (used in log filename)
+        buffered: Batch log file writes (default False); only for short
+            runs that are never killed by a watchdog
     """
     if not os.path.isdir(log_dir):
         os.makedirs(log_dir, exist_ok=True)
 
+    root = logging.getLogger()
+    # Like basicConfig, leave an already-configured root logger alone
+    if root.handlers:
+        return
+
     timestr = time.strftime("%Y-%m-%d")
     log_file = os.path.join(log_dir, f"{timestr}_{script_name}.txt")
 
-    logging.basicConfig(
-        filename=log_file,
-        format='%(asctime)s %(levelname)-8s %(message)s',
-        level=logging.INFO
-    )
+    handler = logging.FileHandler(log_file)
+    handler.setFormatter(logging.Formatter('%(asctime)s %(levelname)-8s %(message)s'))
+    if buffered:
+        handler = MemoryHandler(512, flushLevel=logging.ERROR, target=handler)
+
+    root.addHandler(handler)
+    root.setLevel(logging.INFO)
 
 
 def log_and_print(message, level="info"):
@@ -65,14 +99,24 @@ def validate_paths(**paths):
 def get_sde_connections(connection_dir):
     """Return list of .sde file paths from directory.
 
+    The listing is cached per directory and refreshed whenever the
+    directory's modification time changes.
+
     Args:
         connection_dir: Directory containing .sde files
 
     Returns:
         List of full paths to .sde files
     """
-    sde_files = [f for f in os.listdir(connection_dir) if f.endswith('.sde')]
-    return [os.path.join(connection_dir, sde) for sde in sde_files]
+    mtime = os.stat(connection_dir).st_mtime_ns
+    return list(_list_sde_connections(connection_dir, mtime))
+
+
+@functools.lru_cache(maxsize=8)
+def _list_sde_connections(connection_dir, mtime):
+    """Scan a directory for .sde files; mtime is part of the cache key."""
+    with os.scandir(connection_dir) as entries:
+        return tuple(e.path for e in entries if e.name.endswith('.sde') and e.is_file())
 
 
 def get_admin_connection(connection_dir, admin_suffix="_admin"):
@@ -85,28 +129,220 @@ def get_admin_connection(connection_dir, admin_suffix="_admin"):
     Returns:
         Path to admin connection file, or None if not found
     """
-    for f in os.listdir(connection_dir):
-        if f.endswith('.sde') and admin_suffix in f.lower():
-            return os.path.join(connection_dir, f)
+    for path in get_sde_connections(connection_dir):
+        if admin_suffix in os.path.basename(path).lower():
+            return path
     return None
 
 
-def execute_sql(database_path, sql):
+def get_sql_connection(database_path):
+    """Return this process's ArcSDESQLExecute connection for a database.
+
+    Connections are opened on first use and reused by later queries, so a
+    script issuing several queries pays the login handshake once.
+
+    Args:
+        database_path: Path to .sde connection file
+
+    Returns:
+        arcpy.ArcSDESQLExecute object
+    """
+    sde_conn = _sql_connections.get(database_path)
+    if sde_conn is None:
+        import arcpy
+        sde_conn = arcpy.ArcSDESQLExecute(database_path)
+        _sql_connections[database_path] = sde_conn
+    return sde_conn
+
+
+def close_sql_connections(database_path=None):
+    """Release cached SQL connections.
+
+    An open connection holds a geodatabase session, so release it before
+    operations such as compress that want the database to themselves.
+
+    Args:
+        database_path: Connection to release (default: all)
+    """
+    if database_path is None:
+        connections = list(_sql_connections.values())
+        _sql_connections.clear()
+    else:
+        connections = [_sql_connections.pop(database_path, None)]
+
+    for sde_conn in connections:
+        # ArcSDESQLExecute has no close() today and is released when its last
+        # reference goes; close explicitly if a future arcpy provides one
+        close = getattr(sde_conn, 'close', None)
+        if close is not None:
+            try:
+                close()
+            except Exception as e:
+                logging.warning(f"Error closing SQL connection: {e}")
+
+
+atexit.register(close_sql_connections)
+
+
+def execute_sql(database_path, sql, cache=False):
     """Execute SQL via arcpy.ArcSDESQLExecute and return results.
 
     Args:
         database_path: Path to .sde connection file
         sql: SQL query to execute
+        cache: Reuse the result of an identical earlier query in this
+            process. Only for read-only queries whose answer cannot change
+            during the run; cached rows are returned as tuples.
 
     Returns:
         Query results (list of rows or single value)
     """
-    sde_conn = arcpy.ArcSDESQLExecute(database_path)
+    if cache:
+        return _execute_sql_cached(database_path, sql)
     try:
-        result = sde_conn.execute(sql)
-        return result
-    finally:
-        del sde_conn
+        return get_sql_connection(database_path).execute(sql)
+    except Exception:
+        # The connection may be broken; reconnect on the next call
+        close_sql_connections(database_path)
+        raise
+
+
+@functools.lru_cache(maxsize=256)
+def _execute_sql_cached(database_path, sql):
+    """Memoized execute_sql; rows become tuples so callers cannot mutate the cached value."""
+    result = execute_sql(database_path, sql)
+    if isinstance(result, list):
+        return tuple(tuple(row) if isinstance(row, list) else row for row in result)
+    return result
+
+
+def execute_sql_batch(database_path, statements):
+    """Execute several SQL statements over one ArcSDESQLExecute connection.
+
+    ArcSDESQLExecute only returns the first result set of a multi-statement
+    batch, so statements are sent one at a time but share a single
+    connection instead of reconnecting per query.
+
+    Args:
+        database_path: Path to .sde connection file
+        statements: List of SQL queries to execute
+
+    Returns:
+        List of results in statement order (None for statements that failed)
+    """
+    results = []
+    for sql in statements:
+        try:
+            results.append(execute_sql(database_path, sql))
+        except Exception as e:
+            log_and_print(f"SQL statement failed: {e}", "warning")
+            results.append(None)
+    return results
+
+
+def list_versions(database_path):
+    """Return arcpy.da.ListVersions for a database, cached for this process.
+
+    Reconcile, delete and report steps run in the same worker all list the
+    versions of the same geodatabase; call invalidate_versions after
+    changing them so the next caller lists them again.
+
+    Args:
+        database_path: Path to .sde connection file
+
+    Returns:
+        Tuple of arcpy.da Version objects
+    """
+    versions = _version_lists.get(database_path)
+    if versions is None:
+        import arcpy
+        versions = tuple(arcpy.da.ListVersions(database_path))
+        _version_lists[database_path] = versions
+    return versions
+
+
+def invalidate_versions(database_path=None):
+    """Drop cached version lists.
+
+    Args:
+        database_path: Database whose versions changed (default: all)
+    """
+    if database_path is None:
+        _version_lists.clear()
+    else:
+        _version_lists.pop(database_path, None)
+
+
+def sql_literal(value):
+    """Quote a value as a SQL string literal.
+
+    ArcSDESQLExecute has no bind parameters, so values interpolated into
+    SQL must be escaped here instead.
+
+    Args:
+        value: Value to quote
+
+    Returns:
+        Single-quoted literal with embedded quotes doubled
+    """
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+def parameterize_sql(sql, **params):
+    """Wrap a query in sp_executesql with typed parameters.
+
+    SQL Server caches one plan for the parameterized statement and reuses
+    it for every parameter value, where literal values interpolated into
+    the query text would each compile a separate plan.
+
+    Args:
+        sql: Query referencing parameters as @name
+        **params: Parameter values (int, float or str)
+
+    Returns:
+        EXEC sp_executesql batch for ArcSDESQLExecute
+    """
+    declarations = []
+    assignments = []
+    for name, value in params.items():
+        if isinstance(value, bool) or not isinstance(value, (int, float, str)):
+            raise TypeError(f"Unsupported SQL parameter type for @{name}: {type(value).__name__}")
+        if isinstance(value, str):
+            sql_type, literal = "NVARCHAR(4000)", "N" + sql_literal(value)
+        else:
+            sql_type, literal = ("INT", str(value)) if isinstance(value, int) else ("FLOAT", repr(value))
+        declarations.append(f"@{name} {sql_type}")
+        assignments.append(f"@{name} = {literal}")
+
+    return (
+        f"EXEC sp_executesql N{sql_literal(sql)}, "
+        f"N'{', '.join(declarations)}', {', '.join(assignments)}"
+    )
+
+
+def get_http_session():
+    """Return this process's shared requests.Session.
+
+    Token requests and the REST calls that follow go to the same Portal or
+    Server host, so pooling keeps the TLS connection open between them.
+    Failed connections, and idempotent requests that hit a dropped
+    connection, are retried up to 3 times with backoff.
+
+    Returns:
+        requests.Session object
+    """
+    global _http_session
+    if _http_session is None:
+        session = requests.Session()
+        # Sized for the 16-thread REST fan-outs in the server_portal scripts
+        adapter = HTTPAdapter(
+            pool_connections=4, pool_maxsize=16,
+            max_retries=Retry(total=3, backoff_factor=0.3)
+        )
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        _http_session = session
+    return _http_session
 
 
 def get_portal_token(portal_url, username, password):
@@ -131,7 +367,7 @@ def get_portal_token(portal_url, username, password):
         'referer': portal_url,
         'f': 'json'
     }
-    response = requests.post(token_url, data=params, timeout=30)
+    response = get_http_session().post(token_url, data=params, timeout=30)
     response.raise_for_status()
 
     result = response.json()
@@ -141,6 +377,47 @@ def get_portal_token(portal_url, username, password):
     return result['token']
 
 
+def search_portal(portal_url, token, query, max_workers=8):
+    """Run a Portal item search and return every page of results.
+
+    Portal caps a page at 100 results, so the first page is read for the
+    total and the remaining pages are fetched concurrently.
+
+    Args:
+        portal_url: Portal base URL
+        token: Authentication token
+        query: Portal search query string
+        max_workers: Pages fetched at once after the first
+
+    Returns:
+        List of raw result item dicts, in search order
+
+    Raises:
+        ValueError: If Portal returns an error for any page
+        requests.RequestException: If a request fails
+    """
+    search_url = f"{portal_url}/sharing/rest/search"
+    page_size = 100
+
+    def fetch(start):
+        params = {'q': query, 'num': page_size, 'start': start, 'f': 'json', 'token': token}
+        data = get_http_session().get(search_url, params=params, timeout=60).json()
+        if 'error' in data:
+            raise ValueError(f"Search error: {data['error']}")
+        return data
+
+    first = fetch(1)
+    results = list(first.get('results', []))
+    if first.get('nextStart', -1) == -1:
+        return results
+
+    starts = range(first['nextStart'], first.get('total', 0) + 1, page_size)
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(starts)))) as executor:
+        for page in executor.map(fetch, starts):
+            results.extend(page.get('results', []))
+    return results
+
+
 def get_ags_token(server_url, username, password):
     """Authenticate to ArcGIS Server and return token.
 
@@ -162,7 +439,7 @@ def get_ags_token(server_url, username, password):
         'client': 'requestip',
         'f': 'json'
     }
-    response = requests.post(token_url, data=params, timeout=30, verify=False)
+    response = get_http_session().post(token_url, data=params, timeout=30, verify=False)
     response.raise_for_status()
 
     result = response.json()
@@ -172,24 +449,58 @@ def get_ags_token(server_url, username, password):
     return result['token']
 
 
+def safe_filename(name):
+    """Replace characters other than letters, digits and ._- with underscores.
+
+    Args:
+        name: Proposed file name (e.g. a Portal item title)
+
+    Returns:
+        File name safe to use on Windows and POSIX
+    """
+    if name.isascii():
+        return name.translate(_UNSAFE_FILENAME_CHARS)
+    return "".join(c if c.isalnum() or c in '._-' else '_' for c in name)
+
+
+@functools.lru_cache(maxsize=4096)
 def format_bytes(size_bytes):
     """Format bytes to human-readable string.
 
+    Results are cached; report tables repeat the same sizes (notably 0)
+    across many rows.
+
     Args:
         size_bytes: Size in bytes
 
     Returns:
         Formatted string (e.g., "1.5 GB")
     """
-    for unit in ['B', 'KB', 'MB', 'GB', 'TB']:
-        if abs(size_bytes) < 1024.0:
-            return f"{size_bytes:.2f} {unit}"
-        size_bytes /= 1024.0
-    return f"{size_bytes:.2f} PB"
+    if not size_bytes:
+        # Also folds -0.0, which the cache treats as equal to 0
+        size_bytes = 0
+    # Each unit is 2**10 times the last, so the bit length picks it directly
+    i = min(len(_BYTE_UNITS) - 1, int(math.log2(max(abs(size_bytes), 1))) // 10)
+    return f"{size_bytes / (1 << (10 * i)):.2f} {_BYTE_UNITS[i]}"
+
+
+# Registered tables, feature classes (including those in feature datasets)
+# and raster datasets, fully qualified as arcpy lists them
+DATA_LIST_SQL = """
+SELECT i.Name
+FROM sde.GDB_ITEMS i
+INNER JOIN sde.GDB_ITEMTYPES t ON i.Type = t.UUID
+WHERE t.Name IN ('Table', 'Feature Class', 'Raster Dataset')
+ORDER BY i.Name
+"""
 
 
 def get_data_list(database_path):
-    """Build list of all tables, feature classes, rasters, and datasets in a database.
+    """Build list of all tables, feature classes, and rasters in a database.
+
+    Reads the geodatabase catalog (GDB_ITEMS) in one query. If that fails,
+    e.g. on a geodatabase without the catalog tables, falls back to a
+    single arcpy.da.Walk traversal, which also lists unregistered tables.
 
     Args:
         database_path: Path to .sde connection file
@@ -197,16 +508,91 @@ def get_data_list(database_path):
     Returns:
         List of dataset names
     """
-    arcpy.env.workspace = database_path
-    data_list = arcpy.ListTables() + arcpy.ListFeatureClasses() + arcpy.ListRasters()
+    try:
+        result = execute_sql(database_path, DATA_LIST_SQL)
+    except Exception as e:
+        log_and_print(f"Catalog query failed, listing datasets with arcpy: {e}", "warning")
+    else:
+        if not result or result is True:
+            return []
+        if isinstance(result, str):
+            return [result]
+        return [row[0] for row in result]
 
-    for dataset in arcpy.ListDatasets("", "Feature"):
-        arcpy.env.workspace = os.path.join(database_path, dataset)
-        data_list += arcpy.ListFeatureClasses() + arcpy.ListDatasets()
+    import arcpy
+
+    data_list = []
+    walk = arcpy.da.Walk(database_path, datatype=["Table", "FeatureClass", "RasterDataset"])
+    for _dirpath, _dirnames, filenames in walk:
+        data_list.extend(filenames)
 
     return data_list
 
 
+def get_state_snapshot(database_path):
+    """Get state count and newest state ID from SDE_states.
+
+    Args:
+        database_path: Path to .sde connection file
+
+    Returns:
+        Tuple of (state_count, max_state_id), or None if unavailable
+    """
+    try:
+        result = execute_sql(database_path, "SELECT COUNT(*), MAX(state_id) FROM sde.SDE_states")
+        if result and result is not True:
+            return tuple(result[0])
+    except Exception as e:
+        log_and_print(f"Error reading state snapshot: {e}", "warning")
+    return None
+
+
+def get_server_time(database_path):
+    """Get SQL Server's current time as an ISO 8601 string (ms precision).
+
+    Args:
+        database_path: Path to .sde connection file
+
+    Returns:
+        Timestamp string, or None if unavailable
+    """
+    try:
+        result = execute_sql(database_path, "SELECT CONVERT(VARCHAR(23), GETDATE(), 126)")
+        return result if isinstance(result, str) else None
+    except Exception as e:
+        log_and_print(f"Error reading server time: {e}", "warning")
+        return None
+
+
+def get_unchanged_versioned(database_path, since_state):
+    """Get versioned tables with no edits recorded after a state.
+
+    Only versioned tables are tracked in SDE_mvtables_modified, so
+    unversioned tables never appear here and are always maintained.
+
+    Args:
+        database_path: Path to .sde connection file
+        since_state: State ID recorded at the end of the last run
+
+    Returns:
+        Set of lowercase 'owner.table' names
+    """
+    sql = f"""
+    SELECT r.owner, r.table_name
+    FROM sde.SDE_table_registry r
+    WHERE r.object_flags & 8 = 8
+      AND NOT EXISTS (
+          SELECT 1 FROM sde.SDE_mvtables_modified m
+          WHERE m.registration_id = r.registration_id
+            AND m.state_id > {int(since_state)}
+      )
+    """
+    result = execute_sql(database_path, sql)
+    if not result or result is True:
+        return set()
+    return {f"{row[0]}.{row[1]}".lower() for row in result}
+
+
 def process_with_error_handling(operation_name, operation_func, *args, **kwargs):
     """Execute an operation with standardized error handling.
 
@@ -219,6 +605,8 @@ def process_with_error_handling(operation_name, operation_func, *args, **kwargs)
     Returns:
         Tuple of (success: bool, result or error message)
     """
+    import arcpy
+
     try:
         result = operation_func(*args, **kwargs)
         return True, result
@@ -230,3 +618,81 @@ def process_with_error_handling(operation_name, operation_func, *args, **kwargs)
         error_msg = f"Unexpected error during {operation_name}: {e}"
         logging.error(error_msg)
         return False, error_msg
+
+
+def get_max_workers(task_count, env_var="SDE_MAX_PARALLEL", default=8):
+    """Resolve the worker count for parallel per-database processing.
+
+    Args:
+        task_count: Number of tasks to run
+        env_var: Environment variable that overrides the default cap
+        default: Upper bound used when env_var is not set
+
+    Returns:
+        Worker count between 1 and task_count
+    """
+    cap = int(os.environ.get(env_var) or min(default, os.cpu_count() or 1))
+    return max(1, min(cap, task_count))
+
+
+def init_worker_logging(log_queue):
+    """Route a worker process's log records to the parent via a queue.
+
+    Args:
+        log_queue: multiprocessing.Queue drained by the parent's QueueListener
+    """
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    root.addHandler(QueueHandler(log_queue))
+    root.setLevel(logging.INFO)
+
+
+def run_parallel(func, task_args, max_workers, on_result=None):
+    """Run func once per argument tuple across a process pool.
+
+    Worker log records are forwarded to the parent's handlers so all
+    output lands in the same timestamped log file.
+
+    Args:
+        func: Module-level (picklable) function to call
+        task_args: List of argument tuples, one per task
+        max_workers: Maximum number of worker processes
+        on_result: Optional callback(index, result) run in the parent as
+                   each task finishes, while other tasks are still running
+
+    Returns:
+        List of results in task order (None for tasks that raised)
+    """
+    results = [None] * len(task_args)
+
+    if max_workers <= 1:
+        for index, args in enumerate(task_args):
+            try:
+                results[index] = func(*args)
+            except Exception as e:
+                logging.error(f"Worker failed for {args[0]}: {e}")
+            if on_result:
+                on_result(index, results[index])
+        return results
+
+    log_queue = multiprocessing.Queue()
+    listener = QueueListener(log_queue, *logging.getLogger().handlers, respect_handler_level=True)
+    listener.start()
+
+    try:
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=init_worker_logging,
+                                 initargs=(log_queue,)) as executor:
+            futures = {executor.submit(func, *args): i for i, args in enumerate(task_args)}
+            for future in as_completed(futures):
+                index = futures[future]
+                try:
+                    results[index] = future.result()
+                except Exception as e:
+                    logging.error(f"Worker failed for {task_args[index][0]}: {e}")
+                if on_result:
+                    on_result(index, results[index])
+    finally:
+        listener.stop()
+
+    return results
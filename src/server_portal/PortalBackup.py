@@ -5,15 +5,19 @@ These are services that live in Portal's managed datastore, not in your SQL Serv
 """
 
 import os
+import random
+import shutil
 import sys
 import time
-import zipfile
+from concurrent.futures import ThreadPoolExecutor
 
-import requests
 from dotenv import load_dotenv
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from sde_utils import setup_logging, log_and_print, get_portal_token
+from sde_utils import (
+    setup_logging, log_and_print, get_portal_token, get_http_session,
+    search_portal, safe_filename
+)
 
 load_dotenv()
 
@@ -29,39 +33,21 @@ def list_hosted_feature_services(portal_url, token, owner=None):
     Returns:
         List of service item dicts
     """
-    search_url = f"{portal_url}/sharing/rest/search"
-
     query = 'type:"Feature Service" AND typekeywords:Hosted'
     if owner:
         query += f' AND owner:{owner}'
 
-    params = {
-        'q': query,
-        'num': 100,
-        'start': 1,
-        'f': 'json',
-        'token': token
-    }
-
     services = []
     try:
-        while True:
-            response = requests.get(search_url, params=params, timeout=60)
-            data = response.json()
-
-            for item in data.get('results', []):
-                services.append({
-                    'id': item['id'],
-                    'title': item['title'],
-                    'owner': item['owner'],
-                    'url': item.get('url', ''),
-                    'created': item.get('created'),
-                    'modified': item.get('modified')
-                })
-
-            if data.get('nextStart', -1) == -1:
-                break
-            params['start'] = data['nextStart']
+        for item in search_portal(portal_url, token, query):
+            services.append({
+                'id': item['id'],
+                'title': item['title'],
+                'owner': item['owner'],
+                'url': item.get('url', ''),
+                'created': item.get('created'),
+                'modified': item.get('modified')
+            })
 
     except Exception as e:
         log_and_print(f"Error listing services: {e}", "error")
@@ -92,7 +78,7 @@ def export_feature_service(portal_url, item_id, owner, token, output_format="Fil
     }
 
     try:
-        response = requests.post(export_url, data=params, timeout=120)
+        response = get_http_session().post(export_url, data=params, timeout=120)
         data = response.json()
 
         if 'error' in data:
@@ -109,38 +95,51 @@ def export_feature_service(portal_url, item_id, owner, token, output_format="Fil
         return None
 
 
-def check_export_status(portal_url, job_id, export_item_id, token, max_wait=600):
+def check_export_status(portal_url, job_id, export_item_id, owner, token, max_wait=600):
     """Wait for export job to complete.
 
+    Polls the item's job status with exponential backoff (0.5s doubling to
+    10s, +/-20% jitter), so quick exports are picked up promptly and slow
+    ones are not polled any harder.
+
     Args:
         portal_url: Portal base URL
         job_id: Export job ID
         export_item_id: ID of export item
+        owner: Owner username of the export item
         token: Authentication token
         max_wait: Maximum wait time in seconds
 
     Returns:
         True if completed, False if failed/timeout
     """
-    status_url = f"{portal_url}/sharing/rest/content/items/{export_item_id}"
+    status_url = f"{portal_url}/sharing/rest/content/users/{owner}/items/{export_item_id}/status"
 
-    params = {'f': 'json', 'token': token}
-    start_time = time.time()
+    params = {'jobId': job_id, 'jobType': 'export', 'f': 'json', 'token': token}
+    deadline = time.time() + max_wait
+    attempt = 0
 
-    while time.time() - start_time < max_wait:
+    while True:
         try:
-            response = requests.get(status_url, params=params, timeout=30)
+            response = get_http_session().get(status_url, params=params, timeout=30)
             data = response.json()
 
-            if 'error' not in data:
+            status = data.get('status')
+            if status == 'completed':
                 return True
-
-            time.sleep(10)
+            if status == 'failed':
+                log_and_print(f"Export job failed: {data.get('statusMessage', '')}", "error")
+                return False
 
         except Exception:
-            time.sleep(10)
+            pass
 
-    return False
+        delay = min(10.0, 0.5 * 2 ** attempt) * random.uniform(0.8, 1.2)
+        attempt += 1
+        remaining = deadline - time.time()
+        if remaining <= 0:
+            return False
+        time.sleep(min(delay, remaining))
 
 
 def download_export(portal_url, export_item_id, token, output_dir, filename):
@@ -161,18 +160,18 @@ def download_export(portal_url, export_item_id, token, output_dir, filename):
     params = {'token': token}
 
     try:
-        response = requests.get(data_url, params=params, timeout=300, stream=True)
+        # Closing a streamed response hands its connection back to the pool
+        with get_http_session().get(data_url, params=params, timeout=300, stream=True) as response:
+            if response.status_code != 200:
+                log_and_print(f"Download failed: HTTP {response.status_code}", "error")
+                return None
 
-        if response.status_code != 200:
-            log_and_print(f"Download failed: HTTP {response.status_code}", "error")
-            return None
-
-        safe_filename = "".join(c if c.isalnum() or c in '._-' else '_' for c in filename)
-        output_path = os.path.join(output_dir, safe_filename)
+            output_path = os.path.join(output_dir, safe_filename(filename))
 
-        with open(output_path, 'wb') as f:
-            for chunk in response.iter_content(chunk_size=8192):
-                f.write(chunk)
+            # Let urllib3 undo any gzip transfer encoding, then copy in 1 MiB blocks
+            response.raw.decode_content = True
+            with open(output_path, 'wb') as f:
+                shutil.copyfileobj(response.raw, f, length=1 << 20)
 
         return output_path
 
@@ -198,7 +197,7 @@ def delete_export_item(portal_url, export_item_id, owner, token):
     params = {'f': 'json', 'token': token}
 
     try:
-        response = requests.post(delete_url, data=params, timeout=30)
+        response = get_http_session().post(delete_url, data=params, timeout=30)
         data = response.json()
         return data.get('success', False)
     except Exception:
@@ -215,6 +214,10 @@ def format_report(portal_url, results):
     Returns:
         Formatted report string
     """
+    successful, failed = [], []
+    for r in results:
+        (successful if r['success'] else failed).append(r)
+
     lines = [
         "Portal Backup Report",
         "=" * 60,
@@ -222,12 +225,11 @@ def format_report(portal_url, results):
         f"Time: {time.strftime('%Y-%m-%d %H:%M:%S')}",
         "",
         f"Total Services: {len(results)}",
-        f"Successful: {sum(1 for r in results if r['success'])}",
-        f"Failed: {sum(1 for r in results if not r['success'])}",
+        f"Successful: {len(successful)}",
+        f"Failed: {len(failed)}",
         ""
     ]
 
-    successful = [r for r in results if r['success']]
     if successful:
         lines.append("Successful Backups:")
         lines.append("-" * 40)
@@ -237,7 +239,6 @@ def format_report(portal_url, results):
                 lines.append(f"    -> {r['path']}")
         lines.append("")
 
-    failed = [r for r in results if not r['success']]
     if failed:
         lines.append("Failed Backups:")
         lines.append("-" * 40)
@@ -248,7 +249,8 @@ def format_report(portal_url, results):
     return "\n".join(lines)
 
 
-def backup_service(portal_url, service, token, output_dir, output_format, owner):
+def backup_service(portal_url, service, token, output_dir, output_format, owner,
+                   cleanup_executor=None):
     """Backup a single hosted feature service.
 
     Args:
@@ -258,6 +260,8 @@ def backup_service(portal_url, service, token, output_dir, output_format, owner)
         output_dir: Output directory
         output_format: Export format
         owner: Portal username for export
+        cleanup_executor: If set, delete the temporary export item on this
+            executor instead of waiting for the delete
 
     Returns:
         Dict with backup result
@@ -278,18 +282,19 @@ def backup_service(portal_url, service, token, output_dir, output_format, owner)
     if not export_info:
         return result
 
-    log_and_print(f"    Waiting for export to complete...")
+    # Services are backed up concurrently, so name the service on each line
+    log_and_print(f"    {service['title']}: waiting for export to complete...")
 
     if not check_export_status(portal_url, export_info.get('job_id'),
-                                export_info['export_item_id'], token):
-        log_and_print(f"    Export timeout or failed", "error")
+                                export_info['export_item_id'], owner, token):
+        log_and_print(f"    {service['title']}: export timeout or failed", "error")
         return result
 
     extension = '.gdb.zip' if 'Geodatabase' in output_format else '.zip'
     timestr = time.strftime("%Y%m%d")
     filename = f"{timestr}_{service['title']}{extension}"
 
-    log_and_print(f"    Downloading...")
+    log_and_print(f"    {service['title']}: downloading...")
     download_path = download_export(
         portal_url, export_info['export_item_id'], token, output_dir, filename
     )
@@ -297,11 +302,14 @@ def backup_service(portal_url, service, token, output_dir, output_format, owner)
     if download_path:
         result['success'] = True
         result['path'] = download_path
-        log_and_print(f"    Saved: {download_path}")
+        log_and_print(f"    {service['title']}: saved {download_path}")
 
-        delete_export_item(portal_url, export_info['export_item_id'], owner, token)
+        if cleanup_executor is not None:
+            cleanup_executor.submit(delete_export_item, portal_url, export_info['export_item_id'], owner, token)
+        else:
+            delete_export_item(portal_url, export_info['export_item_id'], owner, token)
     else:
-        log_and_print(f"    Download failed", "error")
+        log_and_print(f"    {service['title']}: download failed", "error")
 
     return result
 
@@ -315,6 +323,7 @@ def main():
     output_format = os.environ.get('PORTAL_BACKUP_FORMAT', 'File Geodatabase')
     owner_filter = os.environ.get('PORTAL_BACKUP_OWNER_FILTER', '')
     log_dir = os.environ.get('SDE_LOG_DIR')
+    parallel = int(os.environ.get('PORTAL_BACKUP_PARALLEL', '4'))
 
     if not all([portal_url, username, password, backup_dir]):
         print("Error: PORTAL_URL, PORTAL_ADMIN_USER, PORTAL_ADMIN_PASSWORD, and PORTAL_BACKUP_DIR are required")
@@ -344,12 +353,21 @@ def main():
         log_and_print("No services to backup")
         return
 
-    results = []
-    for service in services:
-        result = backup_service(
-            portal_url, service, token, backup_dir, output_format, username
-        )
-        results.append(result)
+    # Each backup is mostly waiting on Portal (export job, download), so
+    # threads overlap that latency across services
+    max_workers = max(1, min(parallel, len(services)))
+    log_and_print(f"Backing up with {max_workers} worker(s)")
+    # Deleting the temporary export items doesn't hold up the next export;
+    # leaving the outer block waits for the outstanding deletes
+    with ThreadPoolExecutor(max_workers=2) as cleanup_executor, \
+            ThreadPoolExecutor(max_workers=max_workers) as executor:
+        results = list(executor.map(
+            lambda service: backup_service(
+                portal_url, service, token, backup_dir, output_format, username,
+                cleanup_executor
+            ),
+            services
+        ))
 
     success_count = sum(1 for r in results if r['success'])
     log_and_print(f"\nBackup complete: {success_count}/{len(services)} successful")
@@ -4,88 +4,120 @@ Identifies items shared with the organization or publicly when they should be pr
 Generates reports listing non-compliant items by access level.
 """
 
+import json
 import os
 import sys
 import time
+from concurrent.futures import ThreadPoolExecutor
 
-import requests
 from dotenv import load_dotenv
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from sde_utils import setup_logging, log_and_print, get_portal_token
+from sde_utils import (
+    setup_logging, log_and_print, get_portal_token, get_http_session,
+    search_portal, safe_filename
+)
 
 load_dotenv()
 
+ACCESS_LEVELS = ('public', 'org', 'shared', 'private')
 
-def get_org_id(portal_url, token):
+# Esri system accounts, left out of the audit
+EXCLUDED_OWNERS = ('esri_nav', 'esri_apps')
+
+# How long a cached organization ID is trusted
+ORG_ID_TTL_SECONDS = 24 * 3600
+
+
+def get_org_id(portal_url, token, cache_dir=None):
     """Get the organization ID from Portal self endpoint.
 
     Args:
         portal_url: Portal base URL
         token: Authentication token
+        cache_dir: If set, reuse an ID cached here within the last
+            ORG_ID_TTL_SECONDS (kept in .portal_org_id.json)
 
     Returns:
         Organization ID string
     """
+    cache = {}
+    cache_path = os.path.join(cache_dir, ".portal_org_id.json") if cache_dir else None
+    if cache_path:
+        try:
+            with open(cache_path) as f:
+                cache = json.load(f)
+        except (OSError, ValueError):
+            cache = {}
+        entry = cache.get(portal_url)
+        if entry and time.time() - entry.get('fetched', 0) < ORG_ID_TTL_SECONDS:
+            return entry['org_id']
+
     self_url = f"{portal_url}/sharing/rest/portals/self"
     params = {'f': 'json', 'token': token}
-    response = requests.get(self_url, params=params, timeout=60)
+    response = get_http_session().get(self_url, params=params, timeout=60)
     data = response.json()
-    return data.get('id', '')
+    org_id = data.get('id', '')
 
+    if cache_path and org_id:
+        cache[portal_url] = {'org_id': org_id, 'fetched': time.time()}
+        try:
+            with open(cache_path, 'w') as f:
+                json.dump(cache, f)
+        except OSError as e:
+            log_and_print(f"Could not cache organization ID: {e}", "warning")
+
+    return org_id
 
-def query_all_portal_items(portal_url, token):
-    """Query all items in Portal regardless of type.
+
+def build_item_query(portal_url, token, cache_dir=None):
+    """Build the search query matching every auditable item in the org.
 
     Args:
         portal_url: Portal base URL
         token: Authentication token
+        cache_dir: Directory for the cached organization ID (optional)
 
     Returns:
-        List of item dicts with id, title, owner, type, access fields
+        Portal search query string
     """
-    search_url = f"{portal_url}/sharing/rest/search"
-
     # Get org ID - wildcard search doesn't always work on Portal
-    org_id = get_org_id(portal_url, token)
+    org_id = get_org_id(portal_url, token, cache_dir)
     query = f'orgid:{org_id}' if org_id else '*'
+    for owner in EXCLUDED_OWNERS:
+        query += f' AND NOT owner:{owner}'
+    return query
 
-    params = {
-        'q': query,
-        'num': 100,
-        'start': 1,
-        'f': 'json',
-        'token': token
-    }
+
+def query_all_portal_items(portal_url, token, query=None, non_compliant_only=False):
+    """Query all items in Portal regardless of type.
+
+    Args:
+        portal_url: Portal base URL
+        token: Authentication token
+        query: Base search query (default: build_item_query)
+        non_compliant_only: Only fetch public and org-shared items
+
+    Returns:
+        List of item dicts with id, title, owner, type, access fields
+    """
+    if query is None:
+        query = build_item_query(portal_url, token)
+    if non_compliant_only:
+        query += ' AND (access:public OR access:org)'
 
     items = []
     try:
-        while True:
-            response = requests.get(search_url, params=params, timeout=60)
-            data = response.json()
-
-            if 'error' in data:
-                log_and_print(f"Search error: {data['error']}", "error")
-                break
-
-            for item in data.get('results', []):
-                # Skip Esri system accounts
-                if item['owner'] in ('esri_nav', 'esri_apps'):
-                    continue
-                items.append({
-                    'id': item['id'],
-                    'title': item['title'],
-                    'owner': item['owner'],
-                    'type': item['type'],
-                    'access': item.get('access', 'private'),
-                    'created': item.get('created'),
-                    'modified': item.get('modified'),
-                    'url': item.get('url', '')
-                })
-
-            if data.get('nextStart', -1) == -1:
-                break
-            params['start'] = data['nextStart']
+        for item in search_portal(portal_url, token, query):
+            if item['owner'] in EXCLUDED_OWNERS:
+                continue
+            items.append({
+                'id': item['id'],
+                'title': item['title'],
+                'owner': item['owner'],
+                'type': item['type'],
+                'access': item.get('access', 'private')
+            })
 
     except Exception as e:
         log_and_print(f"Error querying items: {e}", "error")
@@ -93,6 +125,34 @@ def query_all_portal_items(portal_url, token):
     return items
 
 
+def count_items_by_access(portal_url, token, query):
+    """Count items at each access level without downloading them.
+
+    Args:
+        portal_url: Portal base URL
+        token: Authentication token
+        query: Base search query
+
+    Returns:
+        Dict of access level -> item count, or None on error
+    """
+    search_url = f"{portal_url}/sharing/rest/search"
+
+    def count(access):
+        params = {'q': f'{query} AND access:{access}', 'num': 1, 'start': 1, 'f': 'json', 'token': token}
+        data = get_http_session().get(search_url, params=params, timeout=60).json()
+        if 'error' in data:
+            raise ValueError(f"Search error: {data['error']}")
+        return data.get('total', 0)
+
+    try:
+        with ThreadPoolExecutor(max_workers=len(ACCESS_LEVELS)) as executor:
+            return dict(zip(ACCESS_LEVELS, executor.map(count, ACCESS_LEVELS)))
+    except Exception as e:
+        log_and_print(f"Error counting items: {e}", "error")
+        return None
+
+
 def categorize_by_access(items):
     """Categorize items by their sharing level.
 
@@ -102,7 +162,7 @@ def categorize_by_access(items):
     Returns:
         Dict with 'public', 'org', 'shared', 'private' lists
     """
-    categories = {'public': [], 'org': [], 'shared': [], 'private': []}
+    categories = {level: [] for level in ACCESS_LEVELS}
 
     for item in items:
         access = item.get('access', 'private').lower()
@@ -112,23 +172,23 @@ def categorize_by_access(items):
     return categories
 
 
-def generate_summary(categories, items):
+def generate_summary(categories, counts=None):
     """Generate summary statistics.
 
     Args:
         categories: Dict from categorize_by_access
-        items: Original items list
+        counts: Item count per access level (default: category sizes)
 
     Returns:
         Dict with counts and percentages
     """
-    total = len(items)
+    if counts is None:
+        counts = {key: len(val) for key, val in categories.items()}
+    total = sum(counts.values())
 
     def pct(count):
         return round(count / total * 100, 1) if total > 0 else 0
 
-    counts = {key: len(val) for key, val in categories.items()}
-
     return {
         'total_items': total,
         'public_count': counts['public'],
@@ -143,6 +203,10 @@ def generate_summary(categories, items):
     }
 
 
+# One report entry per item: title/owner/type row, then its ID
+ITEM_FORMAT = "{:<35} {:<15} {:<20}\n  ID: {}".format
+
+
 def format_item_section(items, section_title):
     """Format a section of items for the report.
 
@@ -150,25 +214,55 @@ def format_item_section(items, section_title):
         items: List of item dicts
         section_title: Title for the section
 
-    Returns:
-        List of formatted lines
+    Yields:
+        Formatted lines (each item's entry is one two-line string)
     """
     if not items:
-        return []
+        return
 
-    lines = [
-        section_title,
-        "-" * 70,
-        f"{'Title':<35} {'Owner':<15} {'Type':<20}",
-        "-" * 70
-    ]
+    yield section_title
+    yield "-" * 70
+    yield f"{'Title':<35} {'Owner':<15} {'Type':<20}"
+    yield "-" * 70
 
     for item in items:
-        lines.append(f"{item['title'][:35]:<35} {item['owner'][:15]:<15} {item['type'][:20]:<20}")
-        lines.append(f"  ID: {item['id']}")
+        yield ITEM_FORMAT(item['title'][:35], item['owner'][:15], item['type'][:20], item['id'])
+
+    yield ""
+
+
+def iter_report_lines(summary, categories, portal_url):
+    """Yield the lines of the sharing audit report, without trailing newlines.
+
+    Args:
+        summary: Summary statistics dict
+        categories: Categorized items
+        portal_url: Portal URL for report header
+
+    Yields:
+        Report lines
+    """
+    yield "Portal Sharing Audit Report"
+    yield "=" * 70
+    yield f"Portal: {portal_url}"
+    yield f"Time: {time.strftime('%Y-%m-%d %H:%M:%S')}"
+    yield ""
+    yield "SUMMARY"
+    yield "-" * 40
+    yield f"Total Items:         {summary['total_items']:>6}"
+    yield f"Public Items:        {summary['public_count']:>6}  ({summary['public_percent']}%)"
+    yield f"Organization Items:  {summary['org_count']:>6}  ({summary['org_percent']}%)"
+    yield f"Group Shared Items:  {summary['shared_count']:>6}  ({summary['shared_percent']}%)"
+    yield f"Private Items:       {summary['private_count']:>6}  ({summary['private_percent']}%)"
+    yield ""
+    yield f"Non-compliant Total: {summary['non_compliant_count']:>6}"
+    yield ""
+
+    yield from format_item_section(categories['public'], "PUBLIC ITEMS (shared with everyone)")
+    yield from format_item_section(categories['org'], "ORGANIZATION ITEMS (shared with organization)")
 
-    lines.append("")
-    return lines
+    if summary['non_compliant_count'] == 0:
+        yield "All items are private - no sharing concerns found."
 
 
 def format_text_report(summary, categories, portal_url):
@@ -182,31 +276,7 @@ def format_text_report(summary, categories, portal_url):
     Returns:
         Formatted string
     """
-    lines = [
-        "Portal Sharing Audit Report",
-        "=" * 70,
-        f"Portal: {portal_url}",
-        f"Time: {time.strftime('%Y-%m-%d %H:%M:%S')}",
-        "",
-        "SUMMARY",
-        "-" * 40,
-        f"Total Items:         {summary['total_items']:>6}",
-        f"Public Items:        {summary['public_count']:>6}  ({summary['public_percent']}%)",
-        f"Organization Items:  {summary['org_count']:>6}  ({summary['org_percent']}%)",
-        f"Group Shared Items:  {summary['shared_count']:>6}  ({summary['shared_percent']}%)",
-        f"Private Items:       {summary['private_count']:>6}  ({summary['private_percent']}%)",
-        "",
-        f"Non-compliant Total: {summary['non_compliant_count']:>6}",
-        ""
-    ]
-
-    lines.extend(format_item_section(categories['public'], "PUBLIC ITEMS (shared with everyone)"))
-    lines.extend(format_item_section(categories['org'], "ORGANIZATION ITEMS (shared with organization)"))
-
-    if summary['non_compliant_count'] == 0:
-        lines.append("All items are private - no sharing concerns found.")
-
-    return "\n".join(lines)
+    return "\n".join(iter_report_lines(summary, categories, portal_url))
 
 
 def save_report(text_report, output_dir, portal_name):
@@ -218,7 +288,7 @@ def save_report(text_report, output_dir, portal_name):
         portal_name: Portal name for filename
     """
     timestr = time.strftime("%Y-%m-%d_%H%M%S")
-    safe_name = "".join(c if c.isalnum() or c in '._-' else '_' for c in portal_name)
+    safe_name = safe_filename(portal_name)
 
     txt_path = os.path.join(output_dir, f"{timestr}_{safe_name}_sharing_audit.txt")
     with open(txt_path, 'w') as f:
@@ -232,6 +302,7 @@ def main():
     username = os.environ.get('PORTAL_ADMIN_USER')
     password = os.environ.get('PORTAL_ADMIN_PASSWORD')
     log_dir = os.environ.get('SDE_LOG_DIR')
+    full_scan = os.environ.get('SHARING_AUDIT_FULL', 'false').lower() == 'true'
 
     if not all([portal_url, username, password]):
         print("Error: PORTAL_URL, PORTAL_ADMIN_USER, and PORTAL_ADMIN_PASSWORD required")
@@ -250,16 +321,24 @@ def main():
         log_and_print(f"Authentication failed: {e}", "error")
         return
 
-    items = query_all_portal_items(portal_url, token)
-    log_and_print(f"Found {len(items)} total items")
+    query = build_item_query(portal_url, token, log_dir)
+    counts = None
+    if not full_scan:
+        # Only public/org items are listed, so fetch those and count the rest
+        counts = count_items_by_access(portal_url, token, query)
+    if counts is None:
+        items = query_all_portal_items(portal_url, token, query)
+    else:
+        items = query_all_portal_items(portal_url, token, query, non_compliant_only=True)
 
-    if not items:
+    categories = categorize_by_access(items)
+    summary = generate_summary(categories, counts)
+    log_and_print(f"Found {summary['total_items']} total items")
+
+    if not summary['total_items']:
         log_and_print("No items found in Portal")
         return
 
-    categories = categorize_by_access(items)
-    summary = generate_summary(categories, items)
-
     text_report = format_text_report(summary, categories, portal_url)
     print(text_report)
 
@@ -7,12 +7,12 @@ import os
 import sys
 import time
 import urllib3
+from concurrent.futures import ThreadPoolExecutor
 
-import requests
 from dotenv import load_dotenv
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from sde_utils import setup_logging, log_and_print, get_ags_token
+from sde_utils import setup_logging, log_and_print, get_ags_token, get_http_session
 
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
@@ -40,7 +40,7 @@ def list_services(server_url, token, folder=None):
     params = {'token': token, 'f': 'json'}
 
     try:
-        response = requests.get(url, params=params, timeout=30, verify=False)
+        response = get_http_session().get(url, params=params, timeout=30, verify=False)
         data = response.json()
 
         for svc in data.get('services', []):
@@ -50,9 +50,14 @@ def list_services(server_url, token, folder=None):
                 'folder': folder or 'root'
             })
 
-        if not folder:
-            for subfolder in data.get('folders', []):
-                services.extend(list_services(server_url, token, subfolder))
+        subfolders = [] if folder else data.get('folders', [])
+        if subfolders:
+            # Folder listings are independent round trips; fetch them together
+            with ThreadPoolExecutor(max_workers=min(16, len(subfolders))) as executor:
+                for folder_services in executor.map(
+                    lambda subfolder: list_services(server_url, token, subfolder), subfolders
+                ):
+                    services.extend(folder_services)
 
     except Exception as e:
         log_and_print(f"Error listing services: {e}", "error")
@@ -81,7 +86,7 @@ def get_service_status(server_url, service_name, service_type, token, folder=Non
     params = {'token': token, 'f': 'json'}
 
     try:
-        response = requests.get(url, params=params, timeout=30, verify=False)
+        response = get_http_session().get(url, params=params, timeout=30, verify=False)
         data = response.json()
 
         return {
@@ -101,6 +106,47 @@ def get_service_status(server_url, service_name, service_type, token, folder=Non
         }
 
 
+def get_folder_statuses(server_url, token, folder=None):
+    """Get the status of every service in a folder with one report request.
+
+    Args:
+        server_url: ArcGIS Server admin URL
+        token: Authentication token
+        folder: Service folder (optional)
+
+    Returns:
+        List of status dicts shaped like get_service_status's, or None if
+        the report is unavailable (callers fall back to per-service calls)
+    """
+    if folder and folder != 'root':
+        url = f"{server_url}/admin/services/{folder}/report"
+    else:
+        url = f"{server_url}/admin/services/report"
+
+    params = {'token': token, 'f': 'json'}
+
+    try:
+        response = get_http_session().post(url, data=params, timeout=60, verify=False)
+        data = response.json()
+        if 'reports' not in data:
+            return None
+
+        statuses = []
+        for svc in data['reports']:
+            status = svc.get('status') or {}
+            statuses.append({
+                'name': svc['serviceName'],
+                'type': svc['type'],
+                'folder': folder or 'root',
+                'status': status.get('realTimeState', 'UNKNOWN'),
+                'configured_state': status.get('configuredState', 'UNKNOWN')
+            })
+        return statuses
+    except Exception as e:
+        log_and_print(f"Service report unavailable for {folder or 'root'}: {e}", "warning")
+        return None
+
+
 def clear_service_cache(server_url, service_name, service_type, token, folder=None):
     """Clear cache for a map service.
 
@@ -129,7 +175,7 @@ def clear_service_cache(server_url, service_name, service_type, token, folder=No
     }
 
     try:
-        response = requests.post(url, data=params, timeout=60, verify=False)
+        response = get_http_session().post(url, data=params, timeout=60, verify=False)
         data = response.json()
 
         if 'error' in data:
@@ -163,13 +209,19 @@ def restart_service(server_url, service_name, service_type, token, folder=None):
     params = {'token': token, 'f': 'json'}
 
     try:
-        response = requests.post(f"{base_url}/stop", data=params, timeout=60, verify=False)
+        response = get_http_session().post(f"{base_url}/stop", data=params, timeout=60, verify=False)
         if 'error' in response.json():
             return False
 
-        time.sleep(5)
+        # Start as soon as the stop has taken effect, rather than after a fixed pause
+        deadline = time.time() + 10
+        while time.time() < deadline:
+            status = get_http_session().get(f"{base_url}/status", params=params, timeout=30, verify=False).json()
+            if status.get('realTimeState') == 'STOPPED':
+                break
+            time.sleep(0.2)
 
-        response = requests.post(f"{base_url}/start", data=params, timeout=60, verify=False)
+        response = get_http_session().post(f"{base_url}/start", data=params, timeout=60, verify=False)
         if 'error' in response.json():
             return False
 
@@ -202,11 +254,30 @@ def generate_health_report(server_url, token):
         'services': []
     }
 
-    for svc in services:
-        status = get_service_status(
-            server_url, svc['name'], svc['type'], token, svc['folder']
-        )
-
+    def service_key(svc):
+        return (svc['folder'], svc['name'], svc['type'])
+
+    # One report request per folder covers all of its services
+    folders = list(dict.fromkeys(svc['folder'] for svc in services))
+    known = {}
+    with ThreadPoolExecutor(max_workers=max(1, min(16, len(folders)))) as executor:
+        for folder_statuses in executor.map(
+            lambda folder: get_folder_statuses(server_url, token, folder), folders
+        ):
+            for status in folder_statuses or []:
+                known[service_key(status)] = status
+
+    # Per-service status calls for anything the folder reports did not cover
+    missing = [svc for svc in services if service_key(svc) not in known]
+    if missing:
+        with ThreadPoolExecutor(max_workers=min(16, len(missing))) as executor:
+            for svc, status in zip(missing, executor.map(
+                lambda svc: get_service_status(server_url, svc['name'], svc['type'], token, svc['folder']),
+                missing
+            )):
+                known[service_key(svc)] = status
+
+    for status in (known[service_key(svc)] for svc in services):
         if status['status'] == 'STARTED':
             report['started'] += 1
         elif status['status'] == 'STOPPED':
@@ -282,13 +353,17 @@ def main():
         log_and_print("\nClearing map service caches...")
         map_services = [s for s in report['services'] if s['type'] == 'MapServer']
         cleared = 0
-        for svc in map_services:
-            folder = svc.get('folder')
-            if folder == 'root':
-                folder = None
-            if clear_service_cache(server_url, svc['name'], svc['type'], token, folder):
-                log_and_print(f"  Cleared: {svc['name']}")
-                cleared += 1
+        if map_services:
+            # deleteTiles calls are independent; log from here once they are back
+            with ThreadPoolExecutor(max_workers=min(8, len(map_services))) as executor:
+                outcomes = list(executor.map(
+                    lambda svc: clear_service_cache(server_url, svc['name'], svc['type'], token, svc.get('folder')),
+                    map_services
+                ))
+            for svc, ok in zip(map_services, outcomes):
+                if ok:
+                    log_and_print(f"  Cleared: {svc['name']}")
+                    cleared += 1
         log_and_print(f"Cleared {cleared}/{len(map_services)} map service caches")
 
     if log_dir:
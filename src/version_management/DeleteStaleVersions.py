@@ -5,39 +5,84 @@ and configurable exclusion patterns.
 """
 
 import os
+import re
 import sys
+from collections import defaultdict
 from datetime import datetime
 
-import arcpy
 from dotenv import load_dotenv
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from sde_utils import (
     setup_logging, log_and_print, validate_paths,
-    get_sde_connections, execute_sql
+    get_sde_connections, execute_sql, get_max_workers, run_parallel,
+    parameterize_sql, list_versions, invalidate_versions
 )
 
 load_dotenv()
 
 
-def get_version_details(database_path):
-    """Get versions with age information via SQL.
+def _stale_predicate(alias, pattern_count):
+    """Build the SQL condition for a stale, non-excluded version.
+
+    Args:
+        alias: SDE_versions table alias
+        pattern_count: Number of @p0..@pN exclude pattern parameters
+
+    Returns:
+        SQL boolean expression
+    """
+    # Compare the bare column so an index on creation_time can be used
+    conditions = [f"{alias}.creation_time <= DATEADD(day, -@max_age_days, GETDATE())"]
+    conditions += [f"LOWER({alias}.owner + '.' + {alias}.name) NOT LIKE @p{i}"
+                   for i in range(pattern_count)]
+    return " AND ".join(conditions)
+
+
+def _like_contains(pattern):
+    """Turn an exclude pattern into a case-insensitive LIKE substring match.
+
+    Args:
+        pattern: Exclude pattern (e.g., "QA_")
+
+    Returns:
+        LIKE pattern with wildcard characters escaped
+    """
+    escaped = pattern.lower().replace('[', '[[]').replace('%', '[%]').replace('_', '[_]')
+    return f"%{escaped}%"
+
+
+def get_version_details(database_path, max_age_days, exclude_patterns=None):
+    """Get stale, non-excluded versions with age information via SQL.
+
+    The age threshold and exclude patterns are applied server-side, so
+    only deletion candidates are returned.
 
     Args:
         database_path: Path to .sde connection file
+        max_age_days: Maximum age in days
+        exclude_patterns: List of patterns to exclude (e.g., ["QA_", "PROD_"])
 
     Returns:
-        List of dicts with version name, owner, age_days
+        List of dicts with version name, owner, parent, age_days and
+        has_kept_children (a direct child is not itself a candidate)
     """
-    sql = """
-    SELECT name, owner, parent_name, creation_time,
-           DATEDIFF(day, creation_time, GETDATE()) as age_days
-    FROM dbo.SDE_versions
-    WHERE name != 'DEFAULT'
+    exclude_patterns = exclude_patterns or []
+    sql = f"""
+    SELECT v.name, v.owner, v.parent_name, v.creation_time,
+           DATEDIFF(day, v.creation_time, GETDATE()) as age_days,
+           CASE WHEN EXISTS (
+               SELECT 1 FROM dbo.SDE_versions c
+               WHERE c.parent_name = v.name AND c.parent_owner = v.owner
+                 AND NOT ({_stale_predicate('c', len(exclude_patterns))})
+           ) THEN 1 ELSE 0 END as has_kept_children
+    FROM dbo.SDE_versions v
+    WHERE v.name != 'DEFAULT' AND {_stale_predicate('v', len(exclude_patterns))}
     """
+    params = {f"p{i}": _like_contains(p) for i, p in enumerate(exclude_patterns)}
 
     try:
-        results = execute_sql(database_path, sql)
+        results = execute_sql(database_path, parameterize_sql(sql, max_age_days=int(max_age_days), **params))
         if not results or results is True:
             return []
 
@@ -56,11 +101,20 @@ def get_version_details(database_path):
                 'owner': owner,
                 'parent': parent,
                 'created': row[3],
-                'age_days': row[4]
+                'age_days': row[4],
+                'has_kept_children': bool(row[5])
             })
         return versions
     except Exception:
-        return get_version_details_arcpy(database_path)
+        versions = get_version_details_arcpy(database_path)
+        stale = filter_stale_versions(versions, max_age_days, exclude_patterns)
+        stale_names = {v['name'] for v in stale}
+        children_by_parent = defaultdict(list)
+        for v in versions:
+            children_by_parent[v.get('parent')].append(v['name'])
+        for v in stale:
+            v['has_kept_children'] = has_non_stale_children(v['name'], stale_names, children_by_parent)
+        return stale
 
 
 def get_version_details_arcpy(database_path):
@@ -75,23 +129,24 @@ def get_version_details_arcpy(database_path):
     versions = []
     now = datetime.now()
 
-    for version in arcpy.da.ListVersions(database_path):
-        if version.name.upper() == "DBO.DEFAULT":
+    for version in list_versions(database_path):
+        # Read each property once; ListVersions objects fetch them on access
+        name = version.name
+        if name.upper() == "DBO.DEFAULT":
             continue
 
-        age_days = 0
-        if hasattr(version, 'created') and version.created:
-            age_days = (now - version.created).days
+        created = getattr(version, 'created', None)
+        owner, dot, _ = name.partition('.')
 
         versions.append({
-            'name': version.name,
-            'owner': version.name.split('.')[0] if '.' in version.name else 'sde',
+            'name': name,
+            'owner': owner if dot else 'sde',
             'parent': version.parentVersionName,
-            'created': version.created if hasattr(version, 'created') else None,
-            'age_days': age_days
+            'created': created,
+            'age_days': (now - created).days if created else 0
         })
 
-    return sorted(versions, key=lambda x: x['age_days'], reverse=True)
+    return versions
 
 
 def filter_stale_versions(versions, max_age_days, exclude_patterns=None):
@@ -105,72 +160,75 @@ def filter_stale_versions(versions, max_age_days, exclude_patterns=None):
     Returns:
         List of versions to delete
     """
-    exclude_patterns = exclude_patterns or []
+    # One case-insensitive alternation instead of a substring test per pattern
+    excluded = None
+    if exclude_patterns:
+        excluded = re.compile('|'.join(re.escape(p) for p in exclude_patterns), re.IGNORECASE).search
 
     def is_stale_and_not_excluded(version):
         if version['age_days'] < max_age_days:
             return False
-        version_name_lower = version['name'].lower()
-        return not any(p.lower() in version_name_lower for p in exclude_patterns)
+        return excluded is None or not excluded(version['name'])
 
     return [v for v in versions if is_stale_and_not_excluded(v)]
 
 
-def order_versions_for_deletion(versions):
-    """Order versions so children are deleted before parents.
+def group_versions_for_deletion(versions):
+    """Group versions into generations that can be deleted in order.
+
+    No version in a generation is the parent of another in the same or an
+    earlier generation, so each generation's deletes are independent.
 
     Args:
         versions: List of version dicts with 'name' and 'parent' keys
 
     Returns:
-        List of versions ordered for safe deletion (leaves first)
+        List of generations (lists of versions), leaves first
     """
-    version_names = {v['name'] for v in versions}
     version_map = {v['name']: v for v in versions}
 
-    # Build children lookup
-    children = {v['name']: [] for v in versions}
+    # Kahn's algorithm: a version is ready once all its children are placed
+    child_count = dict.fromkeys(version_map, 0)
     for v in versions:
         parent = v.get('parent')
-        if parent and parent in children:
-            children[parent].append(v['name'])
+        if parent in child_count:
+            child_count[parent] += 1
 
-    # Topological sort: process leaves first
-    ordered = []
-    remaining = set(version_names)
+    generations = []
+    ready = [name for name, count in child_count.items() if count == 0]
+    placed = 0
 
-    while remaining:
-        # Find versions with no remaining children
-        leaves = [name for name in remaining
-                  if all(child not in remaining for child in children[name])]
+    while ready:
+        generations.append([version_map[name] for name in ready])
+        placed += len(ready)
+        next_ready = []
+        for name in ready:
+            parent = version_map[name].get('parent')
+            if parent in child_count:
+                child_count[parent] -= 1
+                if child_count[parent] == 0:
+                    next_ready.append(parent)
+        ready = next_ready
 
-        if not leaves:
-            # Circular dependency or external parent - add remaining
-            ordered.extend(version_map[name] for name in remaining)
-            break
+    if placed < len(version_map):
+        # Circular dependency - add remaining
+        generations.append([v for name, v in version_map.items() if child_count[name] > 0])
 
-        for name in leaves:
-            ordered.append(version_map[name])
-            remaining.remove(name)
+    return generations
 
-    return ordered
 
-
-def has_non_stale_children(version_name, stale_names, all_versions):
+def has_non_stale_children(version_name, stale_names, children_by_parent):
     """Check if version has children that aren't in the stale list.
 
     Args:
         version_name: Name of version to check
         stale_names: Set of version names marked for deletion
-        all_versions: All versions with parent info
+        children_by_parent: Dict of parent name -> child version names
 
     Returns:
         True if version has children not in stale list
     """
-    for v in all_versions:
-        if v.get('parent') == version_name and v['name'] not in stale_names:
-            return True
-    return False
+    return any(child not in stale_names for child in children_by_parent.get(version_name, ()))
 
 
 def delete_version(database_path, version_name):
@@ -183,15 +241,18 @@ def delete_version(database_path, version_name):
     Returns:
         True if successful, False otherwise
     """
+    import arcpy
+
     try:
         arcpy.DeleteVersion_management(database_path, version_name)
+        invalidate_versions(database_path)
         return True
     except arcpy.ExecuteError as e:
         log_and_print(f"Error deleting {version_name}: {e}", "error")
         return False
 
 
-def process_database(database_path, sde_name, max_age_days, exclude_patterns):
+def process_database(database_path, sde_name, max_age_days, exclude_patterns, delete_workers=1):
     """Delete stale versions for a database.
 
     Args:
@@ -199,46 +260,41 @@ def process_database(database_path, sde_name, max_age_days, exclude_patterns):
         sde_name: Name of database for logging
         max_age_days: Maximum version age in days
         exclude_patterns: Patterns to exclude from deletion
+        delete_workers: Processes deleting sibling versions at once
 
     Returns:
         Dict with processing summary
     """
     log_and_print(f"Checking stale versions in: {sde_name}")
 
-    versions = get_version_details(database_path)
-    if not versions:
-        log_and_print(f"No child versions found in {sde_name}")
-        return {'database': sde_name, 'deleted': 0, 'skipped': 0}
-
-    stale = filter_stale_versions(versions, max_age_days, exclude_patterns)
+    stale = get_version_details(database_path, max_age_days, exclude_patterns)
     if not stale:
         log_and_print(f"No stale versions (>{max_age_days} days) in {sde_name}")
         return {'database': sde_name, 'deleted': 0, 'skipped': 0}
 
     # Filter out parents with non-stale children
-    stale_names = {v['name'] for v in stale}
-    for v in stale[:]:
-        if has_non_stale_children(v['name'], stale_names, versions):
-            log_and_print(
-                f"Skipping {v['name']} - has non-stale child versions",
-                "warning"
-            )
-            stale.remove(v)
+    skipped = [v['name'] for v in stale if v['has_kept_children']]
+    if skipped:
+        stale = [v for v in stale if not v['has_kept_children']]
+        log_and_print(
+            f"Skipping {len(skipped)} version(s) with non-stale child versions: {', '.join(skipped)}",
+            "warning"
+        )
 
     if not stale:
         log_and_print(f"No deletable stale versions in {sde_name}")
         return {'database': sde_name, 'deleted': 0, 'skipped': 0}
 
-    # Order versions for safe deletion (children before parents)
-    stale = order_versions_for_deletion(stale)
-
     log_and_print(f"Found {len(stale)} stale version(s) to delete")
 
+    # Children before parents; versions within a generation are independent
     deleted = 0
-    for version in stale:
-        log_and_print(f"Deleting: {version['name']} (age: {version['age_days']} days)")
-        if delete_version(database_path, version['name']):
-            deleted += 1
+    for generation in group_versions_for_deletion(stale):
+        for version in generation:
+            log_and_print(f"Deleting: {version['name']} (age: {version['age_days']} days)")
+        workers = max(1, min(delete_workers, len(generation)))
+        tasks = [(database_path, version['name']) for version in generation]
+        deleted += sum(1 for ok in run_parallel(delete_version, tasks, workers) if ok)
 
     log_and_print(f"Deleted {deleted}/{len(stale)} versions")
 
@@ -251,11 +307,14 @@ def process_database(database_path, sde_name, max_age_days, exclude_patterns):
 
 def main():
     """Main entry point for stale version cleanup."""
+    import arcpy
+
     connection_dir = os.environ.get('SDE_CONNECTION_DIR')
     log_dir = os.environ.get('SDE_LOG_DIR')
     max_age_days = int(os.environ.get('VERSION_MAX_AGE_DAYS', '30'))
     exclude_str = os.environ.get('VERSION_EXCLUDE_PATTERNS', '')
     exclude_patterns = [p.strip() for p in exclude_str.split(',') if p.strip()]
+    delete_workers = int(os.environ.get('VERSION_DELETE_PARALLEL', '1'))
 
     validate_paths(connection_dir=connection_dir, log_dir=log_dir)
     setup_logging(log_dir, "DeleteStaleVersions")
@@ -273,9 +332,12 @@ def main():
         log_and_print(f"No .sde files found in {connection_dir}", "warning")
         return
 
-    for sde_path in sde_files:
-        sde_name = os.path.basename(sde_path)
-        process_database(sde_path, sde_name, max_age_days, exclude_patterns)
+    max_workers = get_max_workers(len(sde_files))
+    log_and_print(f"Processing {len(sde_files)} database(s) with {max_workers} worker(s)")
+
+    tasks = [(sde_path, os.path.basename(sde_path), max_age_days, exclude_patterns, delete_workers)
+             for sde_path in sde_files]
+    run_parallel(process_database, tasks, max_workers)
 
     log_and_print("DONE!")
 
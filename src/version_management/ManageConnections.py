@@ -8,13 +8,12 @@ import os
 import sys
 import time
 
-import arcpy
 from dotenv import load_dotenv
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from sde_utils import (
     setup_logging, log_and_print, validate_paths,
-    get_sde_connections
+    get_sde_connections, get_max_workers, run_parallel
 )
 
 load_dotenv()
@@ -30,6 +29,8 @@ def set_accept_connections(database_path, accept):
     Returns:
         True if successful, False otherwise
     """
+    import arcpy
+
     try:
         arcpy.AcceptConnections(database_path, accept)
         return True
@@ -47,6 +48,8 @@ def get_connection_count(database_path):
     Returns:
         Number of connected users
     """
+    import arcpy
+
     try:
         users = arcpy.ListUsers(database_path)
         return len(users) if users else 0
@@ -54,12 +57,18 @@ def get_connection_count(database_path):
         return -1
 
 
-def block_and_wait(database_path, timeout_minutes=5):
+def block_and_wait(database_path, timeout_minutes=5, initial_interval=0.5, max_interval=30):
     """Block connections and wait for existing connections to drain.
 
+    The polling interval grows by half after each check, so a quick drain
+    is noticed within a second or two while a slow one costs only a few
+    ListUsers calls.
+
     Args:
         database_path: Path to .sde connection file
         timeout_minutes: Maximum time to wait for connections to drain
+        initial_interval: First polling interval in seconds
+        max_interval: Upper bound for the polling interval in seconds
 
     Returns:
         Dict with success status and final connection count
@@ -67,27 +76,28 @@ def block_and_wait(database_path, timeout_minutes=5):
     if not set_accept_connections(database_path, False):
         return {'success': False, 'connections_remaining': -1}
 
-    log_and_print("Connections blocked. Waiting for existing connections to drain...")
+    # Several databases drain at once, so name the database on each line
+    sde_name = os.path.basename(database_path)
+    log_and_print(f"{sde_name}: connections blocked. Waiting for existing connections to drain...")
 
-    timeout_seconds = timeout_minutes * 60
-    check_interval = 10
-    elapsed = 0
+    deadline = time.monotonic() + timeout_minutes * 60
+    check_interval = initial_interval
 
-    while elapsed < timeout_seconds:
+    while time.monotonic() < deadline:
         count = get_connection_count(database_path)
         if count == 0:
-            log_and_print("All connections drained")
+            log_and_print(f"{sde_name}: all connections drained")
             return {'success': True, 'connections_remaining': 0}
         if count == 1:
-            log_and_print("Only admin connection remains")
+            log_and_print(f"{sde_name}: only admin connection remains")
             return {'success': True, 'connections_remaining': 1}
 
-        log_and_print(f"Waiting... {count} connection(s) remaining")
-        time.sleep(check_interval)
-        elapsed += check_interval
+        log_and_print(f"{sde_name}: waiting... {count} connection(s) remaining")
+        time.sleep(min(check_interval, max(0, deadline - time.monotonic())))
+        check_interval = min(check_interval * 1.5, max_interval)
 
     final_count = get_connection_count(database_path)
-    log_and_print(f"Timeout reached. {final_count} connection(s) still active", "warning")
+    log_and_print(f"{sde_name}: timeout reached. {final_count} connection(s) still active", "warning")
 
     return {'success': False, 'connections_remaining': final_count}
 
@@ -109,13 +119,13 @@ def process_database(database_path, sde_name, action, timeout_minutes):
     if action == "allow":
         success = set_accept_connections(database_path, True)
         status = "enabled" if success else "failed"
-        log_and_print(f"Connections {status}")
+        log_and_print(f"{sde_name}: connections {status}")
         return {'database': sde_name, 'action': action, 'success': success}
 
     elif action == "block":
         success = set_accept_connections(database_path, False)
         status = "blocked" if success else "failed"
-        log_and_print(f"Connections {status}")
+        log_and_print(f"{sde_name}: connections {status}")
         return {'database': sde_name, 'action': action, 'success': success}
 
     elif action == "block_and_wait":
@@ -134,6 +144,8 @@ def process_database(database_path, sde_name, action, timeout_minutes):
 
 def main():
     """Main entry point for connection management."""
+    import arcpy
+
     connection_dir = os.environ.get('SDE_CONNECTION_DIR')
     log_dir = os.environ.get('SDE_LOG_DIR')
     timeout_minutes = int(os.environ.get('CONNECTION_TIMEOUT_MINUTES', '5'))
@@ -153,9 +165,12 @@ def main():
         log_and_print(f"No .sde files found in {connection_dir}", "warning")
         return
 
-    for sde_path in sde_files:
-        sde_name = os.path.basename(sde_path)
-        process_database(sde_path, sde_name, action, timeout_minutes)
+    max_workers = get_max_workers(len(sde_files))
+    log_and_print(f"Processing {len(sde_files)} database(s) with {max_workers} worker(s)")
+
+    # Drain waits overlap across databases instead of adding up
+    tasks = [(sde_path, os.path.basename(sde_path), action, timeout_minutes) for sde_path in sde_files]
+    run_parallel(process_database, tasks, max_workers)
 
     log_and_print("DONE!")
 
@@ -7,17 +7,44 @@ to the DEFAULT version and optionally posting edits.
 import os
 import sys
 
-import arcpy
 from dotenv import load_dotenv
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from sde_utils import (
     setup_logging, log_and_print, validate_paths,
-    get_sde_connections, execute_sql
+    get_sde_connections, execute_sql, get_max_workers, run_parallel,
+    list_versions, invalidate_versions
 )
 
 load_dotenv()
 
+# Geoprocessing message IDs reported when a reconcile stops on conflicts
+# (000084: "Conflicts detected, aborting the reconcile")
+RECONCILE_CONFLICT_CODES = frozenset({84})
+
+
+def has_conflict_error(error):
+    """Check whether the last geoprocessing tool failed on conflicts.
+
+    Looks at the tool's message IDs first and only falls back to the
+    error text if none of them is a known conflict ID.
+
+    Args:
+        error: The arcpy.ExecuteError raised by the tool
+
+    Returns:
+        True if the failure was caused by version conflicts
+    """
+    import arcpy
+
+    try:
+        codes = {arcpy.GetReturnCode(i) for i in range(arcpy.GetMessageCount())}
+    except Exception:
+        codes = set()
+    if codes & RECONCILE_CONFLICT_CODES:
+        return True
+    return "conflict" in str(error).lower()
+
 
 def get_child_versions(database_path):
     """Get list of non-DEFAULT versions with details.
@@ -29,13 +56,15 @@ def get_child_versions(database_path):
         List of dicts with version name, owner, and parent
     """
     versions = []
-    for version in arcpy.da.ListVersions(database_path):
-        if version.name.upper() != "DBO.DEFAULT":
+    for version in list_versions(database_path):
+        name = version.name
+        if name.upper() != "DBO.DEFAULT":
+            owner, dot, _ = name.partition('.')
             versions.append({
-                'name': version.name,
-                'owner': version.name.split('.')[0] if '.' in version.name else 'sde',
+                'name': name,
+                'owner': owner if dot else 'sde',
                 'parent': version.parentVersionName,
-                'created': version.created if hasattr(version, 'created') else None
+                'created': getattr(version, 'created', None)
             })
     return versions
 
@@ -54,6 +83,8 @@ def reconcile_and_post(database_path, version_name, target_version="DBO.DEFAULT"
     Returns:
         Dict with success status and any conflicts
     """
+    import arcpy
+
     result = {
         'version': version_name,
         'success': False,
@@ -63,9 +94,6 @@ def reconcile_and_post(database_path, version_name, target_version="DBO.DEFAULT"
     }
 
     try:
-        # Set workspace before reconcile operation
-        arcpy.env.workspace = database_path
-
         arcpy.ReconcileVersions_management(
             database_path,
             "ALL_VERSIONS",
@@ -81,9 +109,11 @@ def reconcile_and_post(database_path, version_name, target_version="DBO.DEFAULT"
         result['success'] = True
         result['posted'] = post
         result['deleted'] = delete_after
+        if delete_after:
+            invalidate_versions(database_path)
 
     except arcpy.ExecuteError as e:
-        if "conflict" in str(e).lower():
+        if has_conflict_error(e):
             result['conflicts'] = True
         log_and_print(f"Error reconciling {version_name}: {e}", "error")
 
@@ -137,6 +167,8 @@ def process_database(database_path, sde_name, delete_after_post=False):
 
 def main():
     """Main entry point for version reconcile/post."""
+    import arcpy
+
     connection_dir = os.environ.get('SDE_CONNECTION_DIR')
     log_dir = os.environ.get('SDE_LOG_DIR')
     delete_after = os.environ.get('DELETE_AFTER_POST', 'false').lower() == 'true'
@@ -153,9 +185,11 @@ def main():
         log_and_print(f"No .sde files found in {connection_dir}", "warning")
         return
 
-    for sde_path in sde_files:
-        sde_name = os.path.basename(sde_path)
-        process_database(sde_path, sde_name, delete_after)
+    max_workers = get_max_workers(len(sde_files))
+    log_and_print(f"Processing {len(sde_files)} database(s) with {max_workers} worker(s)")
+
+    tasks = [(sde_path, os.path.basename(sde_path), delete_after) for sde_path in sde_files]
+    run_parallel(process_database, tasks, max_workers)
 
     log_and_print("DONE!")
 